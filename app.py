@@ -1,8 +1,13 @@
+import asyncio
 import os
-from typing import Dict, List, Optional, Any
-from fastapi import FastAPI, HTTPException, Query
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from urllib.parse import urlencode
 import uvicorn
 from dotenv import load_dotenv
 
@@ -10,6 +15,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import services
+from utils import cache, get_http_client, close_http_client
+from utils.cache import CacheEntry, stale_age
+from utils.codec import CONTENT_CODINGS, encode_json
 from services import (
     crypto_service,
     weather_service,
@@ -37,15 +45,84 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class CachedJSONResponse(Response):
+    """Sends a cache entry's stored JSON, pre-compressed when the client accepts it.
+
+    Each compressed body is built once per cache entry, so repeated requests for
+    the same data never re-compress it.
+    """
+    media_type = "application/json"
+
+    def __init__(self, entry: CacheEntry, headers: Optional[Dict[str, str]] = None):
+        self.entry = entry
+        super().__init__(content=entry.raw, headers=headers)
+        self.headers["vary"] = "Accept-Encoding"
+
+    def _pick_encoding(self, scope) -> Optional[str]:
+        if len(self.entry.raw) < cache.compress_min_bytes:
+            return None
+        accepted = {}
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                for part in value.decode("latin-1").split(","):
+                    coding, _, params = part.strip().partition(";")
+                    q = params.strip()[2:] if params.strip().startswith("q=") else "1"
+                    try:
+                        accepted[coding.strip().lower()] = float(q)
+                    except ValueError:
+                        continue
+        for coding in CONTENT_CODINGS:
+            if accepted.get(coding, accepted.get("*", 0)) > 0:
+                return coding
+        return None
+
+    async def __call__(self, scope, receive, send) -> None:
+        encoding = self._pick_encoding(scope)
+        if encoding:
+            self.body = await self.entry.encoded(encoding)
+            self.headers["content-encoding"] = encoding
+            self.headers["content-length"] = str(len(self.body))
+        await super().__call__(scope, receive, send)
+
+def cached_response(data: Any) -> Response:
+    """JSON response flagged with staleness headers when cached data was served past its TTL.
+
+    Services called with raw=True hand back the cache entry, whose stored bytes are sent as-is.
+    """
+    if isinstance(data, CacheEntry):
+        return CachedJSONResponse(data, headers=cache.freshness_headers())
+    return JSONResponse(content=data, headers=cache.freshness_headers())
+
+def is_error(data: Any) -> bool:
+    """Services report missing keys or bad input as a decoded {"error": ...} dict"""
+    return isinstance(data, dict) and "error" in data
+
 @app.on_event("startup")
 async def startup_event():
-    """Log startup event"""
+    """Open shared resources and log startup event"""
+    await cache.open()
+    await crypto_service.open()
+    get_http_client()
+    await events_service.start()
+    cache.start_sweeper(float(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "300")))
+    hn_refresh_interval = float(os.getenv("HN_REFRESH_INTERVAL_SECONDS", "60"))
+    if hn_refresh_interval > 0:
+        trends_service.hn_feed.start(hn_refresh_interval)
     await events_service.log_event(
         event="API Started",
         description="FastAPI backend server started successfully",
         icon="🚀"
     )
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared resources"""
+    await trends_service.hn_feed.stop()
+    await events_service.stop()
+    await crypto_service.close()
+    await cache.close()
+    await close_http_client()
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -58,7 +135,9 @@ async def root():
             "ip-info": "/ip-info",
             "trending": "/trending",
             "news": "/news",
-            "events": "/events"
+            "events": "/events",
+            "overview": "/overview",
+            "batch": "/batch"
         },
         "docs": "/docs"
     }
@@ -74,28 +153,32 @@ async def get_crypto_prices(coins: Optional[str] = Query(None, description="Comm
     """Get current cryptocurrency prices"""
     try:
         coin_list = coins.split(",") if coins else None
-        data = await crypto_service.get_crypto_prices(coin_list)
+        data = await crypto_service.get_crypto_prices(coin_list, raw=True)
         await events_service.log_api_call("crypto", "prices", data is not None)
         
         if not data:
             raise HTTPException(status_code=503, detail="Unable to fetch crypto prices")
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "crypto_prices")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/crypto/history/{coin_id}")
-async def get_crypto_history(coin_id: str, days: int = Query(7, ge=1, le=365)):
+async def get_crypto_history(
+    coin_id: str,
+    days: int = Query(7, ge=1, le=365),
+    points: Optional[int] = Query(None, ge=3, le=5000, description="Downsample to at most this many points (LTTB)")
+):
     """Get historical price data for a cryptocurrency"""
     try:
-        data = await crypto_service.get_crypto_history(coin_id, days)
+        data = await crypto_service.get_crypto_history(coin_id, days, raw=True, points=points)
         await events_service.log_api_call("crypto", f"history/{coin_id}", data is not None)
         
         if not data:
             raise HTTPException(status_code=503, detail="Unable to fetch crypto history")
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "crypto_history")
         raise HTTPException(status_code=500, detail=str(e))
@@ -104,13 +187,13 @@ async def get_crypto_history(coin_id: str, days: int = Query(7, ge=1, le=365)):
 async def get_trending_crypto():
     """Get trending cryptocurrencies"""
     try:
-        data = await crypto_service.get_trending_coins()
+        data = await crypto_service.get_trending_coins(raw=True)
         await events_service.log_api_call("crypto", "trending", data is not None)
         
         if not data:
             raise HTTPException(status_code=503, detail="Unable to fetch trending crypto")
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "crypto_trending")
         raise HTTPException(status_code=500, detail=str(e))
@@ -119,13 +202,13 @@ async def get_trending_crypto():
 async def get_global_crypto_data():
     """Get global cryptocurrency market data"""
     try:
-        data = await crypto_service.get_global_market_data()
+        data = await crypto_service.get_global_market_data(raw=True)
         await events_service.log_api_call("crypto", "global", data is not None)
         
         if not data:
             raise HTTPException(status_code=503, detail="Unable to fetch global crypto data")
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "crypto_global")
         raise HTTPException(status_code=500, detail=str(e))
@@ -135,13 +218,13 @@ async def get_global_crypto_data():
 async def get_current_weather(city: str = Query(..., description="City name")):
     """Get current weather for a city"""
     try:
-        data = await weather_service.get_current_weather(city)
+        data = await weather_service.get_current_weather(city, raw=True)
         await events_service.log_api_call("weather", "current", data is not None)
         
-        if not data or "error" in data:
+        if not data or is_error(data):
             raise HTTPException(status_code=503, detail=data.get("error", "Unable to fetch weather"))
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "current_weather")
         raise HTTPException(status_code=500, detail=str(e))
@@ -150,13 +233,13 @@ async def get_current_weather(city: str = Query(..., description="City name")):
 async def get_weather_forecast(city: str = Query(..., description="City name"), days: int = Query(5, ge=1, le=5)):
     """Get weather forecast for a city"""
     try:
-        data = await weather_service.get_weather_forecast(city, days)
+        data = await weather_service.get_weather_forecast(city, days, raw=True)
         await events_service.log_api_call("weather", "forecast", data is not None)
         
-        if not data or "error" in data:
+        if not data or is_error(data):
             raise HTTPException(status_code=503, detail=data.get("error", "Unable to fetch forecast"))
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "weather_forecast")
         raise HTTPException(status_code=500, detail=str(e))
@@ -165,13 +248,13 @@ async def get_weather_forecast(city: str = Query(..., description="City name"),
 async def get_weather_by_coordinates(lat: float = Query(...), lon: float = Query(...)):
     """Get weather by coordinates"""
     try:
-        data = await weather_service.get_weather_by_coordinates(lat, lon)
+        data = await weather_service.get_weather_by_coordinates(lat, lon, raw=True)
         await events_service.log_api_call("weather", "coordinates", data is not None)
         
-        if not data or "error" in data:
+        if not data or is_error(data):
             raise HTTPException(status_code=503, detail=data.get("error", "Unable to fetch weather"))
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "weather_coordinates")
         raise HTTPException(status_code=500, detail=str(e))
@@ -181,13 +264,13 @@ async def get_weather_by_coordinates(lat: float = Query(...), lon: float = Query
 async def get_ip_info(ip: Optional[str] = Query(None, description="IP address (optional)")):
     """Get IP information"""
     try:
-        data = await ipinfo_service.get_ip_info(ip)
+        data = await ipinfo_service.get_ip_info(ip, raw=True)
         await events_service.log_api_call("ipinfo", "lookup", data is not None)
         
-        if not data or "error" in data:
+        if not data or is_error(data):
             raise HTTPException(status_code=503, detail=data.get("error", "Unable to fetch IP info"))
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "ip_info")
         raise HTTPException(status_code=500, detail=str(e))
@@ -196,13 +279,13 @@ async def get_ip_info(ip: Optional[str] = Query(None, description="IP address (o
 async def get_current_ip_info():
     """Get current IP information"""
     try:
-        data = await ipinfo_service.get_current_ip_info()
+        data = await ipinfo_service.get_current_ip_info(raw=True)
         await events_service.log_api_call("ipinfo", "current", data is not None)
         
         if not data:
             raise HTTPException(status_code=503, detail="Unable to fetch current IP info")
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "current_ip_info")
         raise HTTPException(status_code=500, detail=str(e))
@@ -212,13 +295,13 @@ async def get_current_ip_info():
 async def get_github_trending(language: str = Query("", description="Programming language"), since: str = Query("daily", description="Time range: daily, weekly, monthly")):
     """Get trending GitHub repositories"""
     try:
-        data = await trends_service.get_github_trending(language, since)
+        data = await trends_service.get_github_trending(language, since, raw=True)
         await events_service.log_api_call("trends", "github", data is not None)
         
         if not data:
             raise HTTPException(status_code=503, detail="Unable to fetch GitHub trending")
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "github_trending")
         raise HTTPException(status_code=500, detail=str(e))
@@ -233,7 +316,7 @@ async def get_hackernews_top(count: int = Query(20, ge=1, le=50)):
         if not data:
             raise HTTPException(status_code=503, detail="Unable to fetch Hacker News stories")
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "hackernews_top")
         raise HTTPException(status_code=500, detail=str(e))
@@ -242,13 +325,13 @@ async def get_hackernews_top(count: int = Query(20, ge=1, le=50)):
 async def get_devto_trending():
     """Get trending Dev.to articles"""
     try:
-        data = await trends_service.get_dev_to_trending()
+        data = await trends_service.get_dev_to_trending(raw=True)
         await events_service.log_api_call("trends", "devto", data is not None)
         
         if not data:
             raise HTTPException(status_code=503, detail="Unable to fetch Dev.to articles")
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "devto_trending")
         raise HTTPException(status_code=500, detail=str(e))
@@ -258,13 +341,13 @@ async def get_devto_trending():
 async def get_news_headlines(country: str = Query("us"), category: Optional[str] = Query(None), page_size: int = Query(20, ge=1, le=100)):
     """Get top news headlines"""
     try:
-        data = await news_service.get_top_headlines(country, category, page_size)
+        data = await news_service.get_top_headlines(country, category, page_size, raw=True)
         await events_service.log_api_call("news", "headlines", data is not None)
         
-        if not data or "error" in data:
+        if not data or is_error(data):
             raise HTTPException(status_code=503, detail=data.get("error", "Unable to fetch news"))
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "news_headlines")
         raise HTTPException(status_code=500, detail=str(e))
@@ -273,13 +356,13 @@ async def get_news_headlines(country: str = Query("us"), category: Optional[str]
 async def search_news(q: str = Query(..., description="Search query"), page_size: int = Query(20, ge=1, le=100)):
     """Search news articles"""
     try:
-        data = await news_service.search_news(q, page_size)
+        data = await news_service.search_news(q, page_size, raw=True)
         await events_service.log_api_call("news", "search", data is not None)
         
-        if not data or "error" in data:
+        if not data or is_error(data):
             raise HTTPException(status_code=503, detail=data.get("error", "Unable to search news"))
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "news_search")
         raise HTTPException(status_code=500, detail=str(e))
@@ -288,17 +371,17 @@ async def search_news(q: str = Query(..., description="Search query"), page_size
 async def get_tech_news():
     """Get technology news"""
     try:
-        data = await news_service.get_tech_news()
+        data = await news_service.get_tech_news(raw=True)
         await events_service.log_api_call("news", "tech", data is not None)
         
-        if not data or "error" in data:
+        if not data or is_error(data):
             # Try alternative source
-            data = await news_service.get_bbc_news()
+            data = await news_service.get_bbc_news(raw=True)
         
         if not data:
             raise HTTPException(status_code=503, detail="Unable to fetch tech news")
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "tech_news")
         raise HTTPException(status_code=500, detail=str(e))
@@ -307,28 +390,252 @@ async def get_tech_news():
 async def get_crypto_news():
     """Get cryptocurrency news"""
     try:
-        data = await news_service.get_crypto_news()
+        data = await news_service.get_crypto_news(raw=True)
         await events_service.log_api_call("news", "crypto", data is not None)
         
         if not data:
             raise HTTPException(status_code=503, detail="Unable to fetch crypto news")
         
-        return JSONResponse(content=data)
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "crypto_news")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Overview endpoint
+OVERVIEW_COINS = "bitcoin,ethereum,binancecoin,cardano"
+
+async def get_tech_news_with_fallback() -> Any:
+    data = await news_service.get_tech_news(raw=True)
+    if not data or is_error(data):
+        # Try alternative source
+        data = await news_service.get_bbc_news(raw=True)
+    return data
+
+async def run_overview_section(fetch: Callable[[], Awaitable[Any]]) -> Tuple[str, Any, float, Optional[float]]:
+    """Run one overview section, returning its status, data, elapsed ms and the age of any stale data served"""
+    started = time.perf_counter()
+    try:
+        data = await fetch()
+    except Exception as e:
+        data = {"error": str(e)}
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    if not data or is_error(data):
+        return "error", data or {"error": "No data"}, elapsed_ms, None
+    # Each section runs in its own task, so this only reflects this section's cache reads
+    age = stale_age.get()
+    return ("stale" if age is not None else "ok"), data, elapsed_ms, age
+
+@app.get("/overview")
+async def get_overview(
+    city: str = Query("New York", description="City for the weather sections"),
+    coins: str = Query(OVERVIEW_COINS, description="Comma-separated list of coin IDs")
+):
+    """Everything the dashboard overview page shows, fetched concurrently in one round trip.
+
+    Each section reports a status of ok, stale, error or timeout. Sections still
+    running at the deadline are left to finish in the background and warm the
+    cache for the next request.
+    """
+    started = time.perf_counter()
+    sections: Dict[str, Callable[[], Awaitable[Any]]] = {
+        "crypto": lambda: crypto_service.get_crypto_prices(coins.split(","), raw=True),
+        "weather": lambda: weather_service.get_current_weather(city, raw=True),
+        "forecast": lambda: weather_service.get_weather_forecast(city, raw=True),
+        "ip_info": lambda: ipinfo_service.get_current_ip_info(raw=True),
+        "github": lambda: trends_service.get_github_trending("", "daily", raw=True),
+        "news": get_tech_news_with_fallback
+    }
+    tasks = {name: asyncio.create_task(run_overview_section(fetch)) for name, fetch in sections.items()}
+    deadline = float(os.getenv("OVERVIEW_DEADLINE_SECONDS", "8"))
+    await asyncio.wait(tasks.values(), timeout=deadline)
+
+    results = {}
+    for name, task in tasks.items():
+        if task.done():
+            results[name] = task.result()
+        else:
+            # Services share fetches through the cache's shielded single-flight, so this
+            # only abandons our wait, not the upstream request
+            task.cancel()
+            results[name] = ("timeout", None, round(deadline * 1000, 1), None)
+    events_stats = events_service.get_stats()
+    results["events"] = ("ok", {"total": events_stats["total"], "by_type": events_stats["by_type"]}, 0.0, None)
+
+    ages = [age for _, _, _, age in results.values() if age is not None]
+    if ages:
+        stale_age.set(max(ages))
+    await events_service.log_api_call(
+        "overview", "page", all(status in ("ok", "stale") for status, _, _, _ in results.values())
+    )
+
+    # Cached sections are spliced in as their stored JSON bytes instead of being decoded and re-encoded
+    parts = []
+    for name, (status, data, elapsed_ms, _) in results.items():
+        payload = data.raw if isinstance(data, CacheEntry) else encode_json(data)
+        parts.append(b'"%s":{"status":"%s","elapsed_ms":%s,"data":%s}' % (
+            name.encode(), status.encode(), encode_json(elapsed_ms), payload
+        ))
+    elapsed_ms = encode_json(round((time.perf_counter() - started) * 1000, 1))
+    body = b'{"sections":{%s},"elapsed_ms":%s}' % (b",".join(parts), elapsed_ms)
+    now = time.time()
+    return CachedJSONResponse(CacheEntry(body, now, now, now), headers=cache.freshness_headers())
+
+# Batch endpoint
+# Routes that never finish or would recurse are not allowed inside a batch
+BATCH_EXCLUDED_PATHS = {"/batch", "/events/stream"}
+
+class BatchItem(BaseModel):
+    path: str
+    params: Dict[str, Any] = {}
+    id: Optional[str] = None  # Key in the results map; defaults to the item's position
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
+async def run_batch_item(item: BatchItem, semaphore: asyncio.Semaphore, timeout: float) -> bytes:
+    """Run one GET sub-request through the ASGI app in-process and return its result as JSON bytes"""
+    if item.path in BATCH_EXCLUDED_PATHS or not item.path.startswith("/"):
+        return b'{"status":400,"elapsed_ms":0.0,"body":%s}' % encode_json({"detail": "Path not allowed in a batch"})
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": item.path,
+        "raw_path": item.path.encode(),
+        "query_string": urlencode(item.params, doseq=True).encode(),
+        "root_path": "",
+        # No Accept-Encoding, so bodies come back uncompressed and can be spliced in
+        "headers": [(b"host", b"batch")],
+        "client": None,
+        "server": None
+    }
+    response = {"status": 500, "headers": [], "body": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(app(scope, receive, send), timeout=timeout)
+        except asyncio.TimeoutError:
+            response = {"status": 504, "headers": [], "body": [encode_json({"detail": "Sub-request timed out"})]}
+        except Exception as e:
+            # The error middleware has usually sent a 500 already; make sure the item says so
+            response = {"status": 500, "headers": [], "body": [encode_json({"detail": str(e)})]}
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    body = b"".join(response["body"])
+    content_type = dict(response["headers"]).get(b"content-type", b"application/json")
+    if not content_type.startswith(b"application/json") or not body:
+        body = encode_json(body.decode("utf-8", errors="replace"))
+    return b'{"status":%d,"elapsed_ms":%s,"body":%s}' % (response["status"], encode_json(elapsed_ms), body)
+
+@app.post("/batch")
+async def run_batch(batch: BatchRequest):
+    """Run several GET endpoints concurrently in-process and return their results keyed by id.
+
+    Each result carries the sub-request's HTTP status, elapsed time and JSON body.
+    """
+    max_requests = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+    if len(batch.requests) > max_requests:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {max_requests} requests")
+    keys = [item.id if item.id is not None else str(index) for index, item in enumerate(batch.requests)]
+    if len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail="Batch request ids must be unique")
+    semaphore = asyncio.Semaphore(int(os.getenv("BATCH_MAX_CONCURRENCY", "8")))
+    timeout = float(os.getenv("BATCH_ITEM_TIMEOUT_SECONDS", "10"))
+    results = await asyncio.gather(*(run_batch_item(item, semaphore, timeout) for item in batch.requests))
+    # Sub-responses are spliced in as the bytes each endpoint produced
+    body = b'{"results":{%s}}' % b",".join(
+        b"%s:%s" % (encode_json(key), result) for key, result in zip(keys, results)
+    )
+    now = time.time()
+    return CachedJSONResponse(CacheEntry(body, now, now, now))
+
+# Cache endpoints
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get cache hit/miss counters per tier, plus crypto price batching and history store counters"""
+    return JSONResponse(content={
+        **cache.stats(),
+        "crypto_price_batches": dict(crypto_service.price_batcher.stats),
+        "crypto_history": dict(crypto_service.history.stats)
+    })
+
 # Events endpoints
 @app.get("/events")
-async def get_recent_events(limit: int = Query(50, ge=1, le=100)):
-    """Get recent dashboard events"""
+async def get_recent_events(
+    limit: int = Query(50, ge=1, le=100),
+    since: Optional[datetime] = Query(None, description="Only events at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only events before this time"),
+    event_type: Optional[str] = Query(None, alias="type", description="Exact event name, e.g. 'API Call'"),
+    cursor: Optional[int] = Query(None, ge=1, description="next_cursor from the previous page"),
+    type_contains: Optional[str] = Query(None, min_length=1, description="Case-insensitive substring of the event name")
+):
+    """Get recent dashboard events, paging backwards through history with next_cursor"""
     try:
-        data = await events_service.get_recent_events(limit)
-        return JSONResponse(content={"events": data})
+        data = await events_service.get_recent_events(
+            limit,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+            event_type=event_type,
+            cursor=cursor,
+            type_contains=type_contains
+        )
+        return cached_response(data)
     except Exception as e:
         await events_service.log_error(str(e), "get_events")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/events/stats")
+async def get_event_stats():
+    """Event counts by type, by service and per minute, maintained as events are logged"""
+    return JSONResponse(content=events_service.get_stats())
+
+@app.get("/events/stream")
+async def stream_events(last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")):
+    """Server-Sent Events stream of new events, resumable with Last-Event-ID"""
+    try:
+        resume_after = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Last-Event-ID must be an event id")
+    subscription = events_service.subscribe(resume_after)
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Too many event stream subscribers")
+    heartbeat = float(os.getenv("EVENTS_STREAM_HEARTBEAT_SECONDS", "15"))
+
+    async def event_source():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    batch = await asyncio.wait_for(subscription.next_batch(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle stream
+                    yield b": keep-alive\n\n"
+                    continue
+                if batch:
+                    yield b"".join(batch)
+                if subscription.closed:
+                    return
+        finally:
+            events_service.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/events/log")
 async def log_custom_event(event: str, description: str, icon: str = "📊"):
     """Log a custom event"""
@@ -348,5 +655,7 @@ if __name__ == "__main__":
         host=host,
         port=port,
         reload=debug,
-        log_level="info"
+        log_level="info",
+        # Open /events/stream connections never finish on their own, so shutdown cancels them after this
+        timeout_graceful_shutdown=int(os.getenv("SHUTDOWN_GRACE_SECONDS", "3"))
     )
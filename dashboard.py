@@ -1,4 +1,5 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -44,6 +45,7 @@ if (navigator.serviceWorker) {
 # Constants
 API_BASE_URL = "http://localhost:8000"
 REFRESH_INTERVAL = 60  # seconds
+HISTORY_CHART_POINTS = 400  # history charts are downsampled server-side beyond this
 
 # Custom CSS for premium, modern UI
 def load_css():
@@ -1315,6 +1317,33 @@ def fetch_data(endpoint: str, params: Dict = None) -> Dict:
         st.error(f"Invalid JSON response from {endpoint}")
         return {}
 
+@st.cache_data(ttl=300)
+def fetch_batch(requests_by_id: Dict[str, tuple]) -> Dict[str, Dict]:
+    """Fetch several GET endpoints in one round trip through /batch.
+
+    Takes {id: (endpoint, params)} and returns {id: data}, with an empty dict for any item that failed.
+    """
+    payload = {
+        "requests": [
+            {"id": key, "path": endpoint, "params": params or {}}
+            for key, (endpoint, params) in requests_by_id.items()
+        ]
+    }
+    try:
+        response = requests.post(f"{API_BASE_URL}/batch", json=payload, timeout=15)
+        response.raise_for_status()
+        results = response.json().get("results", {})
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching batch: {str(e)}")
+        return {key: {} for key in requests_by_id}
+    except json.JSONDecodeError:
+        st.error("Invalid JSON response from /batch")
+        return {key: {} for key in requests_by_id}
+    return {
+        key: results[key]["body"] if results.get(key, {}).get("status") == 200 else {}
+        for key in requests_by_id
+    }
+
 def format_currency(value: float, currency: str = "USD") -> str:
     """Format currency values"""
     if currency == "USD":
@@ -1915,11 +1944,21 @@ def create_premium_metric_card(title, value, delta=None, icon="📊", color="#66
         </div>
         """, unsafe_allow_html=True)
 
+def overview_section(overview: Dict, name: str) -> Any:
+    """Data for one /overview section, or an empty dict if it failed or timed out"""
+    section = overview.get("sections", {}).get(name, {})
+    if section.get("status") in ("ok", "stale"):
+        return section.get("data") or {}
+    return {}
+
 def show_overview():
     """Display a stunning responsive overview dashboard"""
     st.markdown('<div class="metric-section">', unsafe_allow_html=True)
     st.markdown('<h2 class="section-title">🏠 Command Center Overview</h2>', unsafe_allow_html=True)
     
+    # Every section of the page comes from one concurrent backend call
+    overview = fetch_data("/overview", {"city": "New York", "coins": "bitcoin,ethereum,binancecoin,cardano"})
+    
     # Quick stats row - responsive grid
     st.markdown("### ⚡ **Live Market Pulse**")
     st.markdown('<div class="metric-grid">', unsafe_allow_html=True)
@@ -1927,7 +1966,7 @@ def show_overview():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        crypto_data = fetch_data("/crypto/prices", {"coins": "bitcoin"})
+        crypto_data = overview_section(overview, "crypto")
         if crypto_data and "bitcoin" in crypto_data:
             btc_price = crypto_data["bitcoin"]["usd"]
             btc_change = crypto_data["bitcoin"]["usd_24h_change"]
@@ -1940,7 +1979,7 @@ def show_overview():
             )
     
     with col2:
-        weather_data = fetch_data("/weather/current", {"city": "New York"})
+        weather_data = overview_section(overview, "weather")
         if weather_data and "main" in weather_data:
             temp = weather_data["main"]["temp"]
             feels_like = weather_data["main"]["feels_like"]
@@ -1953,7 +1992,7 @@ def show_overview():
             )
     
     with col3:
-        ip_data = fetch_data("/ip-info/current")
+        ip_data = overview_section(overview, "ip_info")
         if ip_data and "country" in ip_data:
             country = ip_data["country"]
             city = ip_data.get("city", "Unknown")
@@ -1966,11 +2005,11 @@ def show_overview():
             )
     
     with col4:
-        events_data = fetch_data("/events")
-        if events_data and "events" in events_data:
-            event_count = len(events_data["events"])
+        events_data = overview_section(overview, "events")
+        if events_data and "total" in events_data:
+            event_count = events_data["total"]
             create_premium_metric_card(
-                "Events Today",
+                "Events Logged",
                 str(event_count),
                 "Real-time",
                 "📊",
@@ -1984,7 +2023,7 @@ def show_overview():
     
     # First chart - Crypto Performance (full width)
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    crypto_portfolio_data = fetch_data("/crypto/prices", {"coins": "bitcoin,ethereum,binancecoin,cardano"})
+    crypto_portfolio_data = overview_section(overview, "crypto")
     if crypto_portfolio_data:
         coins = []
         prices = []
@@ -2029,7 +2068,7 @@ def show_overview():
     
     # Second chart - Weather Trend (full width)
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    weather_forecast = fetch_data("/weather/forecast", {"city": "New York"})
+    weather_forecast = overview_section(overview, "forecast")
     if weather_forecast:
         fig = create_weather_forecast_chart(weather_forecast)
         fig.update_layout(
@@ -2051,7 +2090,7 @@ def show_overview():
         st.markdown("#### 🔥 **Trending Now**")
         
         # Get trending GitHub repos
-        github_data = fetch_data("/trending/github", {"language": "", "since": "daily"})
+        github_data = overview_section(overview, "github")
         if github_data and "items" in github_data:
             for i, repo in enumerate(github_data["items"][:5], 1):
                 st.markdown(f"""
@@ -2091,7 +2130,7 @@ def show_overview():
         st.markdown("#### 📰 **Breaking News**")
         
         # Get tech news
-        news_data = fetch_data("/news/tech")
+        news_data = overview_section(overview, "news")
         if news_data:
             articles = news_data.get("articles", news_data.get("results", []))
             for i, article in enumerate(articles[:5], 1):
@@ -2253,7 +2292,7 @@ def show_crypto_dashboard():
         if coins:
             days = st.selectbox("Historical period:", [7, 30, 90], index=0, key="crypto_days")
             
-            history_data = fetch_data(f"/crypto/history/{coins[0]}", {"days": days})
+            history_data = fetch_data(f"/crypto/history/{coins[0]}", {"days": days, "points": HISTORY_CHART_POINTS})
             if history_data:
                 fig = create_enhanced_crypto_chart(history_data, coins[0])
                 fig.update_layout(
@@ -2420,8 +2459,13 @@ def show_weather_dashboard():
             st.cache_data.clear()
     
     if city:
+        weather = fetch_batch({
+            "current": ("/weather/current", {"city": city}),
+            "forecast": ("/weather/forecast", {"city": city})
+        })
+        
         # Current weather
-        current_weather = fetch_data("/weather/current", {"city": city})
+        current_weather = weather["current"]
         
         if current_weather and "main" in current_weather:
             col1, col2, col3, col4 = st.columns(4)
@@ -2448,7 +2492,7 @@ def show_weather_dashboard():
         
         # Weather forecast
         st.subheader("📅 7-Day Forecast")
-        forecast_data = fetch_data("/weather/forecast", {"city": city})
+        forecast_data = weather["forecast"]
         
         if forecast_data:
             fig = create_weather_forecast_chart(forecast_data)
@@ -2696,47 +2740,50 @@ def show_events_dashboard():
     """Display events dashboard"""
     st.header("📊 Events Dashboard")
     
-    # Fetch recent events
-    events_data = fetch_data("/events")
+    # Filter options
+    col1, col2 = st.columns(2)
+    with col1:
+        event_filter = st.selectbox("Filter Events", ["All", "API Call", "Error", "Page View", "Dashboard"])
+    with col2:
+        limit = st.slider("Number of Events", 10, 50, 20)
+    
+    # Fetch recent events, filtered and limited by the API
+    params = {"limit": limit}
+    if event_filter != "All":
+        params["type_contains"] = event_filter
+    events_data = fetch_data("/events", params)
     
     if events_data and "events" in events_data:
         events = events_data["events"]
         
-        # Event statistics
+        # Event statistics, counted by the backend across all stored history
+        stats = fetch_data("/events/stats")
+        by_type = stats.get("by_type", {})
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("📊 Total Events", len(events))
+            st.metric("📊 Total Events", stats.get("total", 0))
         
         with col2:
-            api_calls = len([e for e in events if "API Call" in e.get("event", "")])
-            st.metric("🔌 API Calls", api_calls)
+            st.metric("🔌 API Calls", by_type.get("API Call", 0))
         
         with col3:
-            errors = len([e for e in events if "Error" in e.get("event", "")])
-            st.metric("🚨 Errors", errors)
+            st.metric("🚨 Errors", by_type.get("Error", 0))
         
         with col4:
-            page_views = len([e for e in events if "Page View" in e.get("event", "")])
-            st.metric("👀 Page Views", page_views)
+            st.metric("👀 Page Views", by_type.get("Page View", 0))
+        
+        per_minute = stats.get("per_minute", [])
+        if per_minute:
+            df = pd.DataFrame(per_minute)
+            df["minute"] = pd.to_datetime(df["minute"])
+            st.bar_chart(df.set_index("minute")["count"], height=160)
         
         # Events timeline
         st.subheader("📅 Recent Events")
         
-        # Filter options
-        col1, col2 = st.columns(2)
-        with col1:
-            event_filter = st.selectbox("Filter Events", ["All", "API Call", "Error", "Page View", "Dashboard"])
-        with col2:
-            limit = st.slider("Number of Events", 10, 50, 20)
-        
-        # Filter events
-        filtered_events = events
-        if event_filter != "All":
-            filtered_events = [e for e in events if event_filter in e.get("event", "")]
-        
         # Display events
-        for event in filtered_events[-limit:]:
+        for event in events:
             event_name = event.get("event", "Unknown Event")
             description = event.get("description", "No description")
             icon = event.get("icon", "📊")
@@ -2759,6 +2806,23 @@ def show_events_dashboard():
             </div>
             """, unsafe_allow_html=True)
         
+        # Live events pushed by the API over Server-Sent Events, no rerun needed
+        st.subheader("🔴 Live Events")
+        components.html(f"""
+        <div id="live-events" style="font-family: Inter, sans-serif; font-size: 13px; color: #ddd;"></div>
+        <script>
+        const list = document.getElementById("live-events");
+        const source = new EventSource("{API_BASE_URL}/events/stream");
+        source.onmessage = (message) => {{
+            const event = JSON.parse(message.data);
+            const row = document.createElement("div");
+            row.textContent = `${{event.icon}} ${{event.event}} - ${{event.timestamp.slice(11, 19)}} - ${{event.description}}`;
+            list.prepend(row);
+            while (list.children.length > 20) list.lastChild.remove();
+        }};
+        </script>
+        """, height=240, scrolling=True)
+        
         # Log custom event
         st.subheader("📝 Log Custom Event")
         
@@ -1,12 +1,393 @@
-from typing import Dict, List, Optional, Any
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Set, Tuple
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import asyncio
+import aiosqlite
 import httpx
+import math
+import numpy as np
+import os
+import sqlite3
+import time
 from utils import cache, get_api_key, make_request
+from utils.cache import CacheEntry
+from utils.codec import encode_json
+
+class PriceBatcher:
+    """Coalesces concurrent price lookups into one upstream call per short window.
+
+    Coin ids requested within ``window`` seconds of the first request are
+    fetched together; each caller then gets back just the coins it asked for.
+    """
+
+    def __init__(self, fetch: Callable[[List[str]], Awaitable[Optional[Dict[str, Any]]]], window: float, max_ids: int):
+        self._fetch = fetch
+        self.window = window
+        self.max_ids = max(1, max_ids)
+        self.stats = {"requests": 0, "upstream_calls": 0}
+        self._batch: Optional[Tuple[Set[str], asyncio.Future]] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def get(self, coins: List[str]) -> Optional[Dict[str, Any]]:
+        self.stats["requests"] += 1
+        if self._batch is None:
+            self._batch = (set(), asyncio.get_running_loop().create_future())
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        ids, future = self._batch
+        ids.update(coins)
+        if len(ids) >= self.max_ids:
+            self._flush()
+        # Shield so one cancelled caller does not fail the batch for everyone else
+        prices = await asyncio.shield(future)
+        if prices is None:
+            return None
+        return {coin: prices[coin] for coin in coins if coin in prices}
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._batch is None:
+            return
+        ids, future = self._batch
+        self._batch = None
+        self.stats["upstream_calls"] += 1
+        asyncio.create_task(self._run(sorted(ids), future))
+
+    async def _run(self, ids: List[str], future: asyncio.Future) -> None:
+        try:
+            future.set_result(await self._fetch(ids))
+        except Exception as e:
+            future.set_exception(e)
+
+# market_chart series, each a list of [timestamp_ms, value] pairs
+CHART_SERIES = ("prices", "market_caps", "total_volumes")
+
+# Encoded slices kept per series, one per (days, points), oldest dropped first
+MAX_VIEWS_PER_SERIES = 16
+
+# Longest range the history endpoint serves, plus a day of slack
+MAX_HISTORY_DAYS = 366
+
+# Days of points kept per granularity; hourly points only serve ranges of up to a day
+HISTORY_RETENTION_DAYS = {"hourly": 2, "daily": MAX_HISTORY_DAYS}
+
+DAY_MS = 86400 * 1000
+BUCKET_MS = {"hourly": 3600 * 1000, "daily": DAY_MS}
+
+def history_granularity(days: int) -> str:
+    """CoinGecko interval used for a market_chart request of this many days"""
+    return "hourly" if days <= 1 else "daily"
+
+def chart_to_rows(chart: Dict[str, Any], granularity: str) -> List[Tuple[int, int, Optional[float], Optional[float], Optional[float]]]:
+    """Collapse a market chart into one (bucket, ts, price, market_cap, total_volume) row per time bucket.
+
+    CoinGecko picks its own resolution for a range and ends every series with
+    a live point. A bucket ends on its boundary and keeps its latest sample, so
+    a settled bucket holds the value at the boundary (the daily close at 00:00
+    UTC) and the open one holds the live point.
+    """
+    step = BUCKET_MS[granularity]
+    buckets: Dict[int, List[Any]] = {}
+    for column, name in enumerate(CHART_SERIES, start=1):
+        for point in chart.get(name) or []:
+            ts = int(point[0])
+            row = buckets.setdefault(-(-ts // step), [ts, None, None, None])
+            if column == 1:
+                row[0] = ts
+            row[column] = point[1]
+    return [(bucket, *row) for bucket, row in sorted(buckets.items())]
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of ``threshold`` points chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The points in between are split
+    into ``threshold - 2`` buckets, and each bucket keeps the point forming the
+    largest triangle with the point kept before it and the next bucket's average.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    missing = np.isnan(y)
+    if missing.any():
+        # Gaps take the interpolated value, only for choosing points
+        valid = ~missing
+        if not valid.any():
+            return np.linspace(0, n - 1, threshold).astype(np.intp)
+        y = np.interp(x, x[valid], y[valid])
+    edges = np.arange(threshold - 1) * (n - 2) // (threshold - 2) + 1
+    counts = np.diff(edges)
+    # Every bucket's average, then the last point standing in for the bucket after the last
+    avg_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / counts, y[-1])
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = a = 0
+    selected[-1] = n - 1
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ax, ay = x[a], y[a]
+        bx, by = avg_x[bucket + 1], avg_y[bucket + 1]
+        # Twice the triangle area for every candidate in the bucket at once
+        area = np.abs((ax - bx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (by - ay))
+        a = lo + int(area.argmax())
+        selected[bucket + 1] = a
+    return selected
+
+class PriceSeries:
+    """One coin's market chart at one granularity, held as parallel typed arrays.
+
+    The series covers everything from ``covered_from`` (ms) up to its last
+    point; any shorter range is a suffix found by binary search on the timestamps.
+    """
+    __slots__ = ("covered_from", "fetched_at", "expires_at", "timestamps", "columns", "_views")
+
+    def __init__(self, covered_from: int, fetched_at: float, ttl: float, rows: List[Tuple[Any, ...]]):
+        self.covered_from = covered_from
+        self.fetched_at = fetched_at
+        self.expires_at = fetched_at + ttl
+        self.timestamps = array("q", (row[0] for row in rows))
+        # Missing values are stored as NaN
+        self.columns: Dict[str, array] = {
+            name: array("d", (math.nan if row[column] is None else row[column] for row in rows))
+            for column, name in enumerate(CHART_SERIES, start=1)
+        }
+        self._views: Dict[int, CacheEntry] = {}
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def covers(self, days: int) -> bool:
+        return self.covered_from <= int(self.fetched_at * 1000) - days * DAY_MS
+
+    def view(self, days: int, points: Optional[int] = None) -> CacheEntry:
+        """The last ``days`` days of every series as a JSON entry, built once per range.
+
+        With ``points``, longer ranges are downsampled by LTTB on the prices, and
+        the same timestamps are kept in every series so they stay aligned.
+        """
+        key = (days, points)
+        entry = self._views.get(key)
+        if entry is None:
+            timestamps = self.timestamps
+            end = timestamps[-1] if timestamps else int(self.fetched_at * 1000)
+            start = bisect_left(timestamps, end - days * DAY_MS)
+            indices: Any = range(start, len(timestamps))
+            if points is not None and len(indices) > points:
+                selected = lttb_indices(
+                    np.frombuffer(timestamps, dtype=np.int64)[start:],
+                    np.frombuffer(self.columns["prices"], dtype=np.float64)[start:],
+                    points
+                )
+                indices = (selected + start).tolist()
+            chart = {
+                name: [
+                    [timestamps[i], None if math.isnan(values[i]) else values[i]]
+                    for i in indices
+                ]
+                for name, values in self.columns.items()
+            }
+            entry = CacheEntry(encode_json(chart), self.fetched_at, self.expires_at, self.expires_at)
+            if len(self._views) >= MAX_VIEWS_PER_SERIES:
+                self._views.pop(next(iter(self._views)))
+            self._views[key] = entry
+        return entry
+
+class HistoryStore:
+    """Append-only local store of market charts per (coin, granularity).
+
+    Points live in SQLite, one row per time bucket, and the series being served
+    are kept in memory as PriceSeries in an LRU of bounded size. Once a range has
+    been fetched, a refresh only asks upstream for the points after the last
+    stored timestamp.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, int], Awaitable[Optional[Dict[str, Any]]]],
+        fetch_range: Callable[[str, int, int], Awaitable[Optional[Dict[str, Any]]]],
+        db_path: str = "history.db",
+        ttl: float = 300,
+        max_series: int = 64
+    ):
+        self._fetch = fetch
+        self._fetch_range = fetch_range
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_series = max(1, max_series)
+        self.stats = {"full_fetches": 0, "incremental_fetches": 0, "slices": 0}
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._open_lock = asyncio.Lock()
+        self._series: "OrderedDict[Tuple[str, str], PriceSeries]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._closed = False
+        self.setup_database()
+
+    def setup_database(self):
+        """Initialize the history database"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                coin TEXT NOT NULL,
+                granularity TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                price REAL,
+                market_cap REAL,
+                total_volume REAL,
+                PRIMARY KEY (coin, granularity, bucket)
+            ) WITHOUT ROWID
+        """)
+        # How far back each series is complete, and when it was last brought up to date
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS history_coverage (
+                coin TEXT NOT NULL,
+                granularity TEXT NOT NULL,
+                covered_from INTEGER NOT NULL,
+                refreshed_at REAL NOT NULL,
+                PRIMARY KEY (coin, granularity)
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+        conn.close()
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            if self._closed:
+                raise RuntimeError("History store is closed")
+            async with self._open_lock:
+                if self._conn is None:
+                    conn = await aiosqlite.connect(self.db_path)
+                    await conn.execute("PRAGMA synchronous=NORMAL")
+                    self._conn = conn
+        return self._conn
+
+    async def open(self) -> None:
+        """Connect, also after close() (the connection is otherwise opened on first use)"""
+        self._closed = False
+        await self._connection()
+
+    async def close(self) -> None:
+        """Cancel refreshes in flight and disconnect; later reads fail until open()"""
+        self._closed = True
+        inflight = list(self._inflight.values())
+        for future in inflight:
+            future.cancel()
+        await asyncio.gather(*inflight, return_exceptions=True)
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def get(self, coin: str, days: int, points: Optional[int] = None) -> Optional[CacheEntry]:
+        key = (coin, history_granularity(days))
+        series = self._series.get(key)
+        if series is None:
+            series = await self._load(key)
+        if series is not None and series.covers(days) and series.is_fresh(time.time()):
+            self._series.move_to_end(key)
+            self.stats["slices"] += 1
+            return series.view(days, points)
+        series = await self._refresh(key, days)
+        return series.view(days, points) if series is not None else None
+
+    async def _refresh(self, key: Tuple[str, str], days: int) -> Optional[PriceSeries]:
+        future = self._inflight.get(key)
+        if future is not None:
+            # Shield so one cancelled caller does not cancel the refresh for everyone else
+            series = await asyncio.shield(future)
+            if series is not None and series.covers(days) and series.is_fresh(time.time()):
+                return series
+        future = asyncio.ensure_future(self._update(key, days))
+        self._inflight[key] = future
+        future.add_done_callback(lambda done: self._inflight.pop(key, None) if self._inflight.get(key) is done else None)
+        return await asyncio.shield(future)
+
+    async def _update(self, key: Tuple[str, str], days: int) -> Optional[PriceSeries]:
+        """Bring a series up to date, appending only new points when the stored range suffices"""
+        coin, granularity = key
+        series = self._series.get(key) or await self._load(key)
+        now = time.time()
+        now_ms = int(now * 1000)
+        if series is not None and len(series.timestamps) and series.covered_from <= now_ms - days * DAY_MS:
+            self.stats["incremental_fetches"] += 1
+            chart = await self._fetch_range(coin, series.timestamps[-1] // 1000, now_ms // 1000)
+            covered_from = series.covered_from
+        else:
+            # Refetch at least the range already held so the store never shrinks
+            held_days = (now_ms - series.covered_from) // DAY_MS if series is not None else 0
+            fetch_days = min(max(days, held_days), HISTORY_RETENTION_DAYS[granularity])
+            self.stats["full_fetches"] += 1
+            chart = await self._fetch(coin, fetch_days)
+            covered_from = now_ms - fetch_days * DAY_MS
+        if not chart:
+            # Serve what is stored rather than nothing when upstream is unavailable
+            return series
+        # Coverage moves forward with the clock, so old points are pruned on every refresh
+        covered_from = max(covered_from, now_ms - HISTORY_RETENTION_DAYS[granularity] * DAY_MS)
+        conn = await self._connection()
+        await conn.executemany(
+            "INSERT OR REPLACE INTO history (coin, granularity, bucket, ts, price, market_cap, total_volume) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(coin, granularity, *row) for row in chart_to_rows(chart, granularity)]
+        )
+        await conn.execute(
+            "DELETE FROM history WHERE coin = ? AND granularity = ? AND bucket < ?",
+            (coin, granularity, covered_from // BUCKET_MS[granularity])
+        )
+        await conn.execute(
+            "INSERT OR REPLACE INTO history_coverage (coin, granularity, covered_from, refreshed_at) VALUES (?, ?, ?, ?)",
+            (coin, granularity, covered_from, now)
+        )
+        await conn.commit()
+        return await self._load(key)
+
+    async def _load(self, key: Tuple[str, str]) -> Optional[PriceSeries]:
+        """Read a stored series into memory, or None if nothing is stored for it"""
+        coin, granularity = key
+        conn = await self._connection()
+        async with conn.execute(
+            "SELECT covered_from, refreshed_at FROM history_coverage WHERE coin = ? AND granularity = ?",
+            (coin, granularity)
+        ) as cursor:
+            coverage = await cursor.fetchone()
+        if coverage is None:
+            return None
+        covered_from, refreshed_at = coverage
+        async with conn.execute(
+            "SELECT ts, price, market_cap, total_volume FROM history "
+            "WHERE coin = ? AND granularity = ? AND bucket >= ? ORDER BY bucket",
+            (coin, granularity, covered_from // BUCKET_MS[granularity])
+        ) as cursor:
+            rows = await cursor.fetchall()
+        series = PriceSeries(covered_from, refreshed_at, self.ttl, rows)
+        self._series[key] = series
+        self._series.move_to_end(key)
+        while len(self._series) > self.max_series:
+            self._series.popitem(last=False)
+        return series
 
 class CryptoService:
     def __init__(self):
         self.base_url = "https://api.coingecko.com/api/v3"
         self.api_key = get_api_key("coingecko")
+        # simple/price lookups from concurrent requests share one upstream call
+        self.price_batcher = PriceBatcher(
+            self._fetch_prices,
+            window=float(os.getenv("CRYPTO_BATCH_WINDOW_MS", "5")) / 1000,
+            max_ids=int(os.getenv("CRYPTO_BATCH_MAX_IDS", "250"))
+        )
+        # Local history per coin; shorter ranges are sliced from it and refreshes only fetch new points
+        self.history = HistoryStore(
+            self._fetch_history,
+            self._fetch_history_range,
+            db_path=os.getenv("CRYPTO_HISTORY_DB_PATH", "history.db"),
+            ttl=300,  # Refresh after 5 minutes
+            max_series=int(os.getenv("CRYPTO_HISTORY_MAX_SERIES", "64"))
+        )
         
     def _get_headers(self) -> Dict[str, str]:
         headers = {"accept": "application/json"}
@@ -14,74 +395,118 @@ class CryptoService:
             headers["x-cg-demo-api-key"] = self.api_key
         return headers
     
-    async def get_crypto_prices(self, coins: List[str] = None) -> Optional[Dict[str, Any]]:
-        """Get current crypto prices for specified coins"""
+    async def get_crypto_prices(self, coins: List[str] = None, raw: bool = False) -> Optional[Dict[str, Any]]:
+        """Get current crypto prices for specified coins.
+
+        Prices are cached per coin, so any subset or ordering of coins is served
+        from cache and only missing or expired coins are fetched upstream.
+        """
         if coins is None:
             coins = ["bitcoin", "ethereum", "binancecoin", "cardano", "solana"]
+        coins = list(dict.fromkeys(coins))
         
-        cache_key = f"crypto_prices_{','.join(coins)}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
-        coins_str = ",".join(coins)
+        # Misses for different coins land in the same batcher window and share one upstream call
+        entries = await asyncio.gather(*(
+            cache.get_or_fetch(
+                f"crypto_price_{coin}",
+                lambda coin=coin: self._fetch_coin_price(coin),
+                ttl=60,  # Cache for 1 minute
+                raw=True
+            )
+            for coin in coins
+        ))
+        # Each lookup ran in its own task, so staleness is recorded here for the response headers
+        cache.note_stale(entries)
+        found = [(coin, entry) for coin, entry in zip(coins, entries) if entry is not None]
+        if not found:
+            return None
+        if not raw:
+            return {coin: entry.value for coin, entry in found}
+        # Splice the stored per-coin JSON into one body rather than decoding and re-encoding it
+        body = b"{%s}" % b",".join(encode_json(coin) + b":" + entry.raw for coin, entry in found)
+        return CacheEntry(
+            body,
+            created_at=min(entry.created_at for _, entry in found),
+            fresh_until=min(entry.fresh_until for _, entry in found),
+            expires_at=min(entry.expires_at for _, entry in found)
+        )
+    
+    async def _fetch_coin_price(self, coin: str) -> Optional[Dict[str, Any]]:
+        prices = await self.price_batcher.get([coin])
+        return prices.get(coin) if prices else None
+    
+    async def _fetch_prices(self, coins: List[str]) -> Optional[Dict[str, Any]]:
+        """One simple/price call for a batch of coins"""
         url = f"{self.base_url}/simple/price"
         params = {
-            "ids": coins_str,
+            "ids": ",".join(coins),
             "vs_currencies": "usd",
             "include_24hr_change": "true",
             "include_24hr_vol": "true",
             "include_market_cap": "true"
         }
-        
-        data = await make_request(url, headers=self._get_headers(), params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=60)  # Cache for 1 minute
-        return data
+        return await make_request(url, headers=self._get_headers(), params=params)
     
-    async def get_crypto_history(self, coin_id: str = "bitcoin", days: int = 7) -> Optional[Dict[str, Any]]:
-        """Get historical price data for a coin"""
-        cache_key = f"crypto_history_{coin_id}_{days}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
+    async def get_crypto_history(
+        self,
+        coin_id: str = "bitcoin",
+        days: int = 7,
+        raw: bool = False,
+        points: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get historical price data for a coin, downsampled to at most ``points`` points if given"""
+        entry = await self.history.get(coin_id, days, points)
+        if entry is None or raw:
+            return entry
+        return entry.value
+    
+    async def _fetch_history(self, coin_id: str, days: int) -> Optional[Dict[str, Any]]:
         url = f"{self.base_url}/coins/{coin_id}/market_chart"
         params = {
             "vs_currency": "usd",
             "days": str(days),
-            "interval": "hourly" if days <= 1 else "daily"
+            "interval": history_granularity(days)
         }
-        
-        data = await make_request(url, headers=self._get_headers(), params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=300)  # Cache for 5 minutes
-        return data
+        return await make_request(url, headers=self._get_headers(), params=params)
+    
+    async def _fetch_history_range(self, coin_id: str, start: int, end: int) -> Optional[Dict[str, Any]]:
+        """market_chart points between two Unix timestamps (seconds)"""
+        url = f"{self.base_url}/coins/{coin_id}/market_chart/range"
+        params = {
+            "vs_currency": "usd",
+            "from": str(start),
+            "to": str(end)
+        }
+        return await make_request(url, headers=self._get_headers(), params=params)
+    
+    async def open(self) -> None:
+        """Open the history database (called on app startup)"""
+        await self.history.open()
     
-    async def get_trending_coins(self) -> Optional[Dict[str, Any]]:
+    async def close(self) -> None:
+        """Close the history database (called on app shutdown)"""
+        await self.history.close()
+    
+    async def get_trending_coins(self, raw: bool = False) -> Optional[Dict[str, Any]]:
         """Get trending cryptocurrencies"""
         cache_key = "trending_coins"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         url = f"{self.base_url}/search/trending"
-        data = await make_request(url, headers=self._get_headers())
-        if data:
-            await cache.set(cache_key, data, ttl=600)  # Cache for 10 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, headers=self._get_headers()),
+            ttl=600,  # Cache for 10 minutes
+            raw=raw
+        )
     
-    async def get_global_market_data(self) -> Optional[Dict[str, Any]]:
+    async def get_global_market_data(self, raw: bool = False) -> Optional[Dict[str, Any]]:
         """Get global cryptocurrency market data"""
         cache_key = "global_market_data"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         url = f"{self.base_url}/global"
-        data = await make_request(url, headers=self._get_headers())
-        if data:
-            await cache.set(cache_key, data, ttl=300)  # Cache for 5 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, headers=self._get_headers()),
+            ttl=300,  # Cache for 5 minutes
+            raw=raw
+        )
 
 crypto_service = CryptoService()
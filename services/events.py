@@ -1,15 +1,517 @@
-from typing import Dict, List, Optional, Any
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Any, Sequence, Set, Tuple
+from collections import deque
 from datetime import datetime
-import httpx
+import asyncio
+import heapq
+import aiosqlite
 import os
-from utils import cache, get_api_key, make_request
+import sqlite3
+import sys
+import time
+from utils import get_api_key, get_http_client
+from utils.codec import encode_json
+
+class EventRecord(NamedTuple):
+    """Compact in-memory event; expanded to the API dict shape only when read"""
+    id: int
+    event: str
+    description: str
+    icon: str
+    timestamp: float
+    service: str = ""  # Upstream service for API call events, empty otherwise
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "event": self.event,
+            "description": self.description,
+            "icon": self.icon,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+            "channel": "dashboard",
+            "service": self.service
+        }
+
+class EventRing:
+    """Fixed-capacity ring buffer of event records.
+
+    Records are keyed by their id, a monotonically increasing sequence number,
+    and live in slot ``id % capacity`` until a record ``capacity`` ids later
+    overwrites them. An index from event type to the ids held for that type
+    lets type-filtered reads skip records of other types.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Event ring capacity must be positive")
+        self.capacity = capacity
+        self._slots: List[Optional[EventRecord]] = [None] * capacity
+        self._count = 0
+        self._by_type: Dict[str, Deque[int]] = {}
+        self.next_seq = 1  # Id for the next record; starts at 1 like SQLite rowids
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def first_seq(self) -> int:
+        """Lowest id that may still be held"""
+        return max(1, self.next_seq - self.capacity)
+
+    def append(self, record: EventRecord) -> int:
+        """Store a record under its id, which must be at least ``next_seq``"""
+        slot = record.id % self.capacity
+        evicted = self._slots[slot]
+        if evicted is not None:
+            ids = self._by_type[evicted.event]
+            if ids and ids[0] == evicted.id:
+                ids.popleft()
+            if not ids:
+                del self._by_type[evicted.event]
+        self._slots[slot] = record
+        self.next_seq = record.id + 1
+        self._count += 1
+        ids = self._by_type.setdefault(record.event, deque())
+        # Ids skipped by a warm start can leave entries the eviction above never reaches
+        while ids and ids[0] < self.first_seq:
+            ids.popleft()
+        ids.append(record.id)
+        return record.id
+
+    def since(self, seq: int) -> List[EventRecord]:
+        """Records with ids above ``seq`` that are still held, oldest first"""
+        records = []
+        for next_id in range(max(seq + 1, self.first_seq), self.next_seq):
+            record = self._slots[next_id % self.capacity]
+            if record is not None and record.id == next_id:
+                records.append(record)
+        return records
+
+    def get(self, seq: int) -> Optional[EventRecord]:
+        """Return the record with this id, or None if it was overwritten"""
+        if self.first_seq <= seq < self.next_seq:
+            record = self._slots[seq % self.capacity]
+            if record is not None and record.id == seq:
+                return record
+        return None
+
+    def latest(self, limit: int) -> List[EventRecord]:
+        """Newest ``limit`` records, oldest first"""
+        start = max(self.first_seq, self.next_seq - max(limit, 0))
+        records = []
+        for seq in range(start, self.next_seq):
+            record = self._slots[seq % self.capacity]
+            # Ids skipped by a warm start leave empty or older records behind
+            if record is not None and record.id == seq:
+                records.append(record)
+        return records
+
+    @property
+    def types(self) -> List[str]:
+        """Event types with at least one record held"""
+        return list(self._by_type)
+
+    def count(self, event_types: Iterable[str]) -> int:
+        """Upper bound on the records held for these types (stale ids are counted)"""
+        return sum(len(self._by_type.get(event_type, ())) for event_type in event_types)
+
+    def latest_of_types(self, event_types: Iterable[str], limit: int) -> List[EventRecord]:
+        """Newest ``limit`` records of any of these types, oldest first"""
+        first_seq = self.first_seq
+        # Each per-type id list is ascending, so walking them backwards and merging yields newest first
+        newest_first = heapq.merge(
+            *(reversed(self._by_type[event_type]) for event_type in event_types if event_type in self._by_type),
+            reverse=True
+        )
+        records = []
+        for seq in newest_first:
+            if len(records) >= limit or seq < first_seq:
+                break
+            record = self._slots[seq % self.capacity]
+            if record is not None and record.id == seq:
+                records.append(record)
+        records.reverse()
+        return records
+
+    def clear(self) -> None:
+        self._slots = [None] * self.capacity
+        self._count = 0
+        self._by_type.clear()
+        self.next_seq = 1
+
+class EventSubscription:
+    """A live stream client's bounded backlog of encoded events.
+
+    When a slow client falls ``max_pending`` events behind, the oldest are
+    dropped; the SSE ids let it notice the gap. Once closed, the stream ends
+    after its last pending events are taken.
+    """
+
+    def __init__(self, max_pending: int):
+        self.pending: Deque[bytes] = deque(maxlen=max(1, max_pending))
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def push(self, frame: bytes) -> None:
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append(frame)
+        self._ready.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def next_batch(self) -> List[bytes]:
+        """Wait for at least one event or close(), then take everything pending"""
+        await self._ready.wait()
+        self._ready.clear()
+        batch = list(self.pending)
+        self.pending.clear()
+        return batch
+
+class EventStats:
+    """Event counters updated as events are recorded.
+
+    Totals per event type and per service cover the events retained in the
+    store, so they drop as retention prunes old rows and match what a restart
+    seeds from the store; the per-minute counts only cover the last
+    ``window_minutes`` minutes.
+    """
+
+    def __init__(self, window_minutes: int = 60):
+        self.window_minutes = max(1, window_minutes)
+        self.total = 0
+        self.by_type: Dict[str, int] = {}
+        self.by_service: Dict[str, int] = {}
+        self.per_minute: Dict[int, int] = {}  # Minutes since the epoch -> event count
+
+    def add(self, event: str, service: str, timestamp: float) -> None:
+        self.add_totals(event, service, 1)
+        self.add_to_minute(int(timestamp // 60), 1)
+
+    def add_totals(self, event: str, service: str, count: int) -> None:
+        self.total += count
+        self.by_type[event] = self.by_type.get(event, 0) + count
+        if service:
+            self.by_service[service] = self.by_service.get(service, 0) + count
+
+    def add_to_minute(self, minute: int, count: int) -> None:
+        if minute not in self.per_minute:
+            # A new bucket is the only time an old one can fall out of the window
+            oldest = minute - self.window_minutes + 1
+            for stale in [m for m in self.per_minute if m < oldest]:
+                del self.per_minute[stale]
+            if minute < oldest:
+                return
+        self.per_minute[minute] = self.per_minute.get(minute, 0) + count
+
+    def remove(self, event: str, service: str, minute: int, count: int) -> None:
+        """Take back events pruned from the store"""
+        self.total -= count
+        for counts, key in ((self.by_type, event), (self.by_service, service)):
+            if key in counts:
+                counts[key] -= count
+                if counts[key] <= 0:
+                    del counts[key]
+        if minute in self.per_minute:
+            self.per_minute[minute] -= count
+            if self.per_minute[minute] <= 0:
+                del self.per_minute[minute]
+
+    def clear(self) -> None:
+        self.total = 0
+        self.by_type.clear()
+        self.by_service.clear()
+        self.per_minute.clear()
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Counters as a JSON-ready dict, with one per-minute bucket per minute of the window"""
+        current = int((now if now is not None else time.time()) // 60)
+        minutes = range(current - self.window_minutes + 1, current + 1)
+        return {
+            "total": self.total,
+            "by_type": dict(self.by_type),
+            "by_service": dict(self.by_service),
+            "per_minute": [
+                {
+                    "minute": datetime.fromtimestamp(minute * 60).isoformat(),
+                    "count": self.per_minute.get(minute, 0)
+                }
+                for minute in minutes
+            ]
+        }
+
+class EventStore:
+    """Append-only SQLite event log with batched inserts and retention.
+
+    Ids are assigned by the service as events are logged, so the store assumes
+    it is the only process writing to its database.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "events.db",
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        retention_days: float = 30,
+        max_rows: int = 100000,
+        retention_interval: float = 300,
+        stats: Optional[EventStats] = None,
+        max_pending: int = 10000
+    ):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        # Unwritten records kept while the store is closed or writes fail; the oldest are dropped first
+        self.max_pending = max(1, max_pending)
+        self.flush_interval = flush_interval
+        # Zero disables the corresponding retention rule
+        self.retention_days = retention_days
+        self.max_rows = max_rows
+        self.retention_interval = retention_interval
+        # Counters kept in step with retention
+        self.stats = stats
+        self.write_stats = {"written": 0, "batches": 0, "pruned": 0, "dropped": 0}
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._pending: Deque[EventRecord] = deque()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._writer: Optional[asyncio.Task] = None
+        self.setup_database()
+
+    def setup_database(self):
+        """Initialize the events database"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                event TEXT NOT NULL,
+                description TEXT NOT NULL,
+                icon TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                service TEXT NOT NULL DEFAULT ''
+            )
+        """)
+        # Databases created by earlier versions lack the newer columns
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+        if "service" not in columns:
+            conn.execute("ALTER TABLE events ADD COLUMN service TEXT NOT NULL DEFAULT ''")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp)")
+        # Index entries end with the rowid, so rows of one type come back in id order
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_event ON events (event)")
+        conn.commit()
+        conn.close()
+
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None
+
+    async def open(self) -> None:
+        """Connect and start the background writer (called on app startup)"""
+        if self._conn is None:
+            self._conn = await aiosqlite.connect(self.db_path)
+            await self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def close(self) -> None:
+        """Stop the writer, write out pending events and disconnect"""
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        if self._conn is not None:
+            await self.flush()
+            await self._conn.close()
+            self._conn = None
+
+    def append(self, record: EventRecord) -> None:
+        """Queue a record for the next batched insert"""
+        self._pending.append(record)
+        self._trim_pending()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _trim_pending(self) -> None:
+        while len(self._pending) > self.max_pending:
+            self._pending.popleft()
+            self.write_stats["dropped"] += 1
+
+    async def flush(self) -> int:
+        """Insert every pending record in one transaction, returning how many were written"""
+        if self._conn is None:
+            return 0
+        async with self._flush_lock:
+            rows = list(self._pending)
+            self._pending.clear()
+            if not rows:
+                return 0
+            try:
+                # OR IGNORE makes re-inserting a batch interrupted after it reached SQLite harmless
+                await self._conn.executemany(
+                    "INSERT OR IGNORE INTO events (id, event, description, icon, timestamp, service) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                await self._conn.commit()
+            except BaseException:
+                self._pending.extendleft(reversed(rows))
+                self._trim_pending()
+                raise
+            self.write_stats["written"] += len(rows)
+            self.write_stats["batches"] += 1
+            return len(rows)
+
+    async def apply_retention(self) -> int:
+        """Delete events older than the retention age or beyond the row limit"""
+        clauses, params = [], []
+        if self.retention_days > 0:
+            clauses.append("timestamp < ?")
+            params.append(time.time() - self.retention_days * 86400)
+        if self.max_rows > 0:
+            async with self._conn.execute(
+                "SELECT id FROM events ORDER BY id DESC LIMIT 1 OFFSET ?", (self.max_rows,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is not None:
+                clauses.append("id <= ?")
+                params.append(row[0])
+        if not clauses:
+            return 0
+        where = " OR ".join(clauses)
+        # Counted before deleting so the stats drop by exactly what is pruned
+        async with self._conn.execute(
+            f"SELECT event, service, CAST(timestamp / 60 AS INTEGER) AS minute, COUNT(*) FROM events "
+            f"WHERE {where} GROUP BY event, service, minute",
+            params
+        ) as cursor:
+            pruned = await cursor.fetchall()
+        if not pruned:
+            return 0
+        await self._conn.execute(f"DELETE FROM events WHERE {where}", params)
+        await self._conn.commit()
+        if self.stats is not None:
+            for event, service, minute, count in pruned:
+                self.stats.remove(event, service, minute, count)
+        deleted = sum(count for *_, count in pruned)
+        self.write_stats["pruned"] += deleted
+        return deleted
+
+    async def _write_loop(self) -> None:
+        next_retention = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                if time.monotonic() >= next_retention:
+                    await self.apply_retention()
+                    next_retention = time.monotonic() + self.retention_interval
+            except Exception as e:
+                print(f"Event store write failed: {e}")
+
+    async def latest(self, limit: int) -> List[EventRecord]:
+        """Newest ``limit`` stored events, oldest first"""
+        async with self._conn.execute(
+            "SELECT id, event, description, icon, timestamp, service FROM events ORDER BY id DESC LIMIT ?",
+            (limit,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return [EventRecord(*row) for row in reversed(rows)]
+
+    async def seed_stats(self, stats: EventStats) -> None:
+        """Load counters for everything already stored"""
+        async with self._conn.execute(
+            "SELECT event, service, COUNT(*) FROM events GROUP BY event, service"
+        ) as cursor:
+            for event, service, count in await cursor.fetchall():
+                stats.add_totals(event, service, count)
+        async with self._conn.execute(
+            "SELECT CAST(timestamp / 60 AS INTEGER) AS minute, COUNT(*) FROM events "
+            "WHERE timestamp >= ? GROUP BY minute ORDER BY minute",
+            ((int(time.time() // 60) - stats.window_minutes + 1) * 60,)
+        ) as cursor:
+            for minute, count in await cursor.fetchall():
+                stats.add_to_minute(minute, count)
+
+    async def query(
+        self,
+        limit: int,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        event_types: Optional[Sequence[str]] = None,
+        before_id: Optional[int] = None
+    ) -> Tuple[List[EventRecord], Optional[int]]:
+        """Page backwards through stored events.
+
+        Returns up to ``limit`` matching events with ids below ``before_id``,
+        oldest first, and the cursor for the next older page (None on the last page).
+        """
+        await self.flush()
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if event_types is not None:
+            clauses.append(f"event IN ({', '.join('?' * len(event_types))})")
+            params.extend(event_types)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # One extra row tells whether an older page exists
+        async with self._conn.execute(
+            f"SELECT id, event, description, icon, timestamp, service FROM events {where} ORDER BY id DESC LIMIT ?",
+            (*params, limit + 1)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        records = [EventRecord(*row) for row in rows[:limit]]
+        next_cursor = records[-1].id if len(rows) > limit else None
+        records.reverse()
+        return records, next_cursor
 
 class EventsService:
     def __init__(self):
         self.api_key = get_api_key("logsnag")
         self.project = os.getenv("LOGSNAG_PROJECT", "api-dashboard")
         self.base_url = "https://api.logsnag.com/v1"
-        self.events = []  # In-memory storage for demo
+        # Local event history, bounded so a long-running process cannot grow without limit
+        self.events = EventRing(int(os.getenv("EVENTS_BUFFER_CAPACITY", "10000")))
+        self.stats = EventStats(int(os.getenv("EVENTS_STATS_WINDOW_MINUTES", "60")))
+        # Durable history; the ring holds its newest events
+        self.store = EventStore(
+            db_path=os.getenv("EVENTS_DB_PATH", "events.db"),
+            batch_size=int(os.getenv("EVENTS_DB_BATCH_SIZE", "200")),
+            flush_interval=float(os.getenv("EVENTS_DB_FLUSH_INTERVAL_SECONDS", "1")),
+            retention_days=float(os.getenv("EVENTS_RETENTION_DAYS", "30")),
+            max_rows=int(os.getenv("EVENTS_MAX_ROWS", "100000")),
+            retention_interval=float(os.getenv("EVENTS_RETENTION_INTERVAL_SECONDS", "300")),
+            stats=self.stats,
+            max_pending=int(os.getenv("EVENTS_DB_MAX_PENDING", "10000"))
+        )
+        # Events waiting to be shipped to LogSnag off the request path
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=int(os.getenv("EVENTS_QUEUE_SIZE", "1000")))
+        self.batch_size = int(os.getenv("EVENTS_BATCH_SIZE", "20"))
+        self.flush_interval = float(os.getenv("EVENTS_FLUSH_INTERVAL_SECONDS", "2"))
+        self.max_retries = int(os.getenv("EVENTS_MAX_RETRIES", "3"))
+        self.shipping_stats = {"queued": 0, "shipped": 0, "dropped": 0, "failed": 0, "retries": 0}
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: List[Dict[str, Any]] = []
+        # Live /events/stream clients
+        self.subscribers: Set[EventSubscription] = set()
+        self.stream_queue_size = int(os.getenv("EVENTS_STREAM_QUEUE_SIZE", "256"))
+        self.max_subscribers = int(os.getenv("EVENTS_STREAM_MAX_SUBSCRIBERS", "1000"))
+        self.stream_dropped = 0
+        self.streams_closed = False
     
     def _get_headers(self) -> Dict[str, str]:
         headers = {
@@ -18,20 +520,63 @@ class EventsService:
         }
         return headers
     
-    async def log_event(self, event: str, description: str, icon: str = "📊", notify: bool = False) -> bool:
-        """Log an event to LogSnag"""
+    def _record(self, event: str, description: str, icon: str, service: str) -> EventRecord:
+        # Event names, icons and most descriptions repeat, so interning shares one copy of each
+        record = EventRecord(
+            self.events.next_seq, sys.intern(event), sys.intern(description), sys.intern(icon), time.time(), sys.intern(service)
+        )
+        self.events.append(record)
+        self.store.append(record)
+        self.stats.add(record.event, record.service, record.timestamp)
+        if self.subscribers:
+            # Encoded once, however many clients are listening
+            frame = self._sse_frame(record)
+            for subscription in self.subscribers:
+                subscription.push(frame)
+        return record
+    
+    @staticmethod
+    def _sse_frame(record: EventRecord) -> bytes:
+        return b"id: %d\ndata: %s\n\n" % (record.id, encode_json(record.to_dict()))
+    
+    def subscribe(self, last_event_id: Optional[int] = None) -> Optional[EventSubscription]:
+        """Register a live stream client, replaying events after ``last_event_id`` still in the ring.
+
+        Returns None when the subscriber limit is reached.
+        """
+        if len(self.subscribers) >= self.max_subscribers:
+            return None
+        subscription = EventSubscription(self.stream_queue_size)
+        if last_event_id is not None:
+            for record in self.events.since(last_event_id):
+                subscription.push(self._sse_frame(record))
+        if self.streams_closed:
+            # Shutting down: send the replay, then let the client reconnect elsewhere
+            subscription.close()
+        self.subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        self.subscribers.discard(subscription)
+        self.stream_dropped += subscription.dropped
+    
+    def close_streams(self) -> None:
+        """End every live stream so the server can finish shutting down"""
+        self.streams_closed = True
+        for subscription in self.subscribers:
+            subscription.close()
+    
+    async def log_event(self, event: str, description: str, icon: str = "📊", notify: bool = False, service: str = "") -> bool:
+        """Record an event locally and, if configured, ship it to LogSnag.
+
+        Events are queued and shipped by a background worker, so this never waits
+        on the network. Returns False if the shipping queue is full and the event
+        was only recorded locally.
+        """
+        self._record(event, description, icon, service)
         if not self.api_key:
-            # Store locally if no API key
-            self.events.append({
-                "event": event,
-                "description": description,
-                "icon": icon,
-                "timestamp": datetime.now().isoformat(),
-                "channel": "dashboard"
-            })
             return True
         
-        url = f"{self.base_url}/log"
         payload = {
             "project": self.project,
             "channel": "dashboard",
@@ -41,63 +586,153 @@ class EventsService:
             "notify": notify
         }
         
+        self._ensure_worker()
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, headers=self._get_headers())
-                return response.status_code == 200
-        except Exception as e:
-            print(f"Failed to log event: {e}")
-            # Store locally as fallback
-            self.events.append({
-                "event": event,
-                "description": description,
-                "icon": icon,
-                "timestamp": datetime.now().isoformat(),
-                "channel": "dashboard"
-            })
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.shipping_stats["dropped"] += 1
             return False
+        self.shipping_stats["queued"] += 1
+        return True
     
-    async def get_recent_events(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get recent events"""
-        cache_key = f"recent_events_{limit}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
-        if not self.api_key:
-            # Return local events if no API key
-            return self.events[-limit:] if self.events else []
-        
-        # For demo purposes, return local events + some sample events
-        sample_events = [
-            {
-                "event": "Dashboard Started",
-                "description": "API Dashboard application initialized",
-                "icon": "🚀",
-                "timestamp": datetime.now().isoformat(),
-                "channel": "dashboard"
-            },
-            {
-                "event": "Crypto Data Fetched",
-                "description": "Successfully retrieved cryptocurrency prices",
-                "icon": "₿",
-                "timestamp": datetime.now().isoformat(),
-                "channel": "dashboard"
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._ship_forever())
+    
+    async def start(self) -> None:
+        """Open the event store, warm the ring from it and start the shipping worker (called on app startup)"""
+        self.streams_closed = False
+        await self.store.open()
+        if not len(self.events):
+            for record in await self.store.latest(self.events.capacity):
+                self.events.append(record)
+            self.stats.clear()
+            await self.store.seed_stats(self.stats)
+        if self.api_key:
+            self._ensure_worker()
+    
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop the worker and flush whatever is still queued (called on app shutdown)"""
+        self.close_streams()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        # A batch interrupted mid-shipment is sent again; LogSnag may see a duplicate
+        batch, self._in_flight = self._in_flight, []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if batch:
+            try:
+                await asyncio.wait_for(self._ship_batch(batch), timeout=timeout)
+            except asyncio.TimeoutError:
+                print(f"Timed out flushing {len(batch)} events on shutdown")
+        await self.store.close()
+    
+    async def _ship_forever(self) -> None:
+        """Collect events into batches by size or time window and ship them"""
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            self._in_flight = batch
+            await self._ship_batch(batch)
+            self._in_flight = []
+    
+    async def _ship_batch(self, batch: List[Dict[str, Any]]) -> None:
+        # LogSnag has no bulk endpoint, so a batch is posted concurrently over the shared client
+        await asyncio.gather(*(self._ship(payload) for payload in batch))
+    
+    async def _ship(self, payload: Dict[str, Any]) -> None:
+        url = f"{self.base_url}/log"
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.shipping_stats["retries"] += 1
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+            try:
+                response = await get_http_client().post(url, json=payload, headers=self._get_headers())
+                if response.status_code == 200:
+                    self.shipping_stats["shipped"] += 1
+                    return
+                if response.status_code < 500 and response.status_code != 429:
+                    # Client errors will not succeed on retry
+                    break
+            except Exception as e:
+                print(f"Failed to log event: {e}")
+        # The event is already in the local store, so nothing is lost
+        self.shipping_stats["failed"] += 1
+    
+    def _matching_types(self, event_type: Optional[str], type_contains: Optional[str]) -> Optional[List[str]]:
+        """Resolve type filters to the exact event types they select, or None for no filter"""
+        if event_type is None and type_contains is None:
+            return None
+        # The stats counters know every event type in the store and the ring
+        types = [event_type] if event_type is not None else list(self.stats.by_type)
+        if type_contains is not None:
+            needle = type_contains.lower()
+            types = [t for t in types if needle in t.lower()]
+        return types
+    
+    async def get_recent_events(
+        self,
+        limit: int = 50,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        event_type: Optional[str] = None,
+        cursor: Optional[int] = None,
+        type_contains: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get recent events, oldest first, with a cursor for the next older page.
+
+        ``since`` and ``until`` are Unix timestamps; ``event_type`` matches the
+        event name exactly and ``type_contains`` case-insensitively; ``cursor``
+        is the ``next_cursor`` of a previous page.
+        """
+        types = self._matching_types(event_type, type_contains)
+        if types is not None and not types:
+            return {"events": [], "next_cursor": None}
+        records = None
+        if since is None and until is None and cursor is None:
+            # The newest page comes from memory when the ring holds more than a page of matches
+            if types is None:
+                if len(self.events) > limit or not self.store.is_open:
+                    records = self.events.latest(limit)
+                    more = len(self.events) > limit
+            elif self.events.count(types) > limit or not self.store.is_open:
+                matches = self.events.latest_of_types(types, limit + 1)
+                if len(matches) > limit or not self.store.is_open:
+                    records = matches[-limit:]
+                    more = len(matches) > limit
+        if records is None:
+            records, next_cursor = await self.store.query(limit, since, until, types, cursor)
+        else:
+            next_cursor = records[0].id if records and more else None
+        return {
+            "events": [record.to_dict() for record in records],
+            "next_cursor": next_cursor
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Event counters plus LogSnag shipping and local store statistics"""
+        return {
+            **self.stats.snapshot(),
+            "shipping": dict(self.shipping_stats),
+            "stream": {
+                "subscribers": len(self.subscribers),
+                "dropped": self.stream_dropped + sum(s.dropped for s in self.subscribers)
             },
-            {
-                "event": "Weather Updated",
-                "description": "Weather information refreshed",
-                "icon": "🌤️",
-                "timestamp": datetime.now().isoformat(),
-                "channel": "dashboard"
-            }
-        ]
-        
-        all_events = sample_events + self.events
-        events = all_events[-limit:] if all_events else []
-        
-        await cache.set(cache_key, events, ttl=60)  # Cache for 1 minute
-        return events
+            "store": dict(self.store.write_stats)
+        }
     
     async def log_dashboard_view(self, page: str):
         """Log dashboard page view"""
@@ -114,7 +749,8 @@ class EventsService:
         await self.log_event(
             event="API Call",
             description=f"{service} {endpoint} call {status}",
-            icon=icon
+            icon=icon,
+            service=service
         )
     
     async def log_error(self, error: str, context: str = ""):
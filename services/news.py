@@ -8,16 +8,12 @@ class NewsService:
         self.api_key = get_api_key("news")
         self.base_url = "https://newsapi.org/v2"
     
-    async def get_top_headlines(self, country: str = "us", category: str = None, page_size: int = 20) -> Optional[Dict[str, Any]]:
+    async def get_top_headlines(self, country: str = "us", category: str = None, page_size: int = 20, raw: bool = False) -> Optional[Dict[str, Any]]:
         """Get top headlines from NewsAPI"""
         if not self.api_key:
             return {"error": "News API key not configured"}
         
         cache_key = f"news_headlines_{country}_{category}_{page_size}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         url = f"{self.base_url}/top-headlines"
         params = {
             "apiKey": self.api_key,
@@ -28,21 +24,19 @@ class NewsService:
         if category:
             params["category"] = category
         
-        data = await make_request(url, params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=900)  # Cache for 15 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, params=params),
+            ttl=900,  # Cache for 15 minutes
+            raw=raw
+        )
     
-    async def search_news(self, query: str, page_size: int = 20, sort_by: str = "publishedAt") -> Optional[Dict[str, Any]]:
+    async def search_news(self, query: str, page_size: int = 20, sort_by: str = "publishedAt", raw: bool = False) -> Optional[Dict[str, Any]]:
         """Search for news articles"""
         if not self.api_key:
             return {"error": "News API key not configured"}
         
         cache_key = f"news_search_{query}_{page_size}_{sort_by}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         url = f"{self.base_url}/everything"
         params = {
             "apiKey": self.api_key,
@@ -52,27 +46,25 @@ class NewsService:
             "language": "en"
         }
         
-        data = await make_request(url, params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=900)  # Cache for 15 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, params=params),
+            ttl=900,  # Cache for 15 minutes
+            raw=raw
+        )
     
-    async def get_tech_news(self) -> Optional[Dict[str, Any]]:
+    async def get_tech_news(self, raw: bool = False) -> Optional[Dict[str, Any]]:
         """Get technology news"""
-        return await self.get_top_headlines(category="technology")
+        return await self.get_top_headlines(category="technology", raw=raw)
     
-    async def get_business_news(self) -> Optional[Dict[str, Any]]:
+    async def get_business_news(self, raw: bool = False) -> Optional[Dict[str, Any]]:
         """Get business news"""
-        return await self.get_top_headlines(category="business")
+        return await self.get_top_headlines(category="business", raw=raw)
     
     # Alternative free news sources
-    async def get_bbc_news(self) -> Optional[List[Dict[str, Any]]]:
+    async def get_bbc_news(self, raw: bool = False) -> Optional[List[Dict[str, Any]]]:
         """Get BBC news RSS feed (free alternative)"""
         cache_key = "bbc_news"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         # Using newsdata.io as an alternative free source
         url = "https://newsdata.io/api/1/news"
         params = {
@@ -83,22 +75,21 @@ class NewsService:
             "size": 20
         }
         
-        data = await make_request(url, params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=1800)  # Cache for 30 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, params=params),
+            ttl=1800,  # Cache for 30 minutes
+            raw=raw
+        )
     
-    async def get_crypto_news(self) -> Optional[List[Dict[str, Any]]]:
+    async def get_crypto_news(self, raw: bool = False) -> Optional[List[Dict[str, Any]]]:
         """Get cryptocurrency news using search"""
         cache_key = "crypto_news"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
         
-        # Search for crypto-related news using the main API
-        if self.api_key:
-            data = await self.search_news("cryptocurrency OR bitcoin OR ethereum", page_size=15)
-        else:
+        async def fetch() -> Optional[Dict[str, Any]]:
+            # Search for crypto-related news using the main API
+            if self.api_key:
+                return await self.search_news("cryptocurrency OR bitcoin OR ethereum", page_size=15)
             # Fallback to free alternative
             try:
                 url = "https://newsdata.io/api/1/news"
@@ -108,10 +99,10 @@ class NewsService:
                     "language": "en",
                     "size": 15
                 }
-                data = await make_request(url, params=params)
+                return await make_request(url, params=params)
             except Exception:
                 # If all else fails, return sample data
-                data = {
+                return {
                     "articles": [
                         {
                             "title": "Cryptocurrency Market Update",
@@ -123,8 +114,6 @@ class NewsService:
                     ]
                 }
         
-        if data:
-            await cache.set(cache_key, data, ttl=1800)  # Cache for 30 minutes
-        return data
+        return await cache.get_or_fetch(cache_key, fetch, ttl=1800, raw=raw)  # Cache for 30 minutes
 
 news_service = NewsService()
@@ -1,11 +1,108 @@
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
+import asyncio
+import os
+import time
 import httpx
 from utils import cache, get_api_key, make_request
+from utils.cache import CacheEntry
+
+class HackerNewsFeed:
+    """Keeps the ranked top stories current in memory.
+
+    Each poll checks ``maxitem.json`` and ``updates.json``; when either has
+    moved, the ranking is re-read and only items that are new to the top list
+    or appear in the updates feed are re-fetched. The feed is only served while
+    its last successful poll is less than ``max_missed_polls`` intervals old.
+    """
+
+    def __init__(self, service: "TrendsService", size: int = 50, max_missed_polls: int = 3):
+        self.service = service
+        self.size = size
+        self.max_missed_polls = max_missed_polls
+        self.interval_seconds: Optional[float] = None
+        self.items: Dict[int, Dict[str, Any]] = {}
+        self.stories: List[Dict[str, Any]] = []  # Ranked, stories only
+        self.last_refresh: Optional[float] = None
+        self._max_item: Optional[int] = None
+        self._updated_ids: Optional[List[int]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        if self.last_refresh is None or self.interval_seconds is None:
+            return False
+        return time.time() - self.last_refresh < self.interval_seconds * self.max_missed_polls
+
+    def top(self, count: int) -> List[Dict[str, Any]]:
+        """Top stories straight from memory"""
+        return self.stories[:count]
+
+    async def poll(self) -> None:
+        """Bring the ranking and changed items up to date"""
+        base_url = self.service.hn_base_url
+        max_item, updates = await asyncio.gather(
+            make_request(f"{base_url}/maxitem.json"),
+            make_request(f"{base_url}/updates.json")
+        )
+        updated_ids = (updates or {}).get("items") or []
+        if self.last_refresh is not None and max_item is not None \
+                and max_item == self._max_item and updated_ids == self._updated_ids:
+            # Nothing has changed, so the stories in memory are confirmed current
+            self.last_refresh = time.time()
+            return
+
+        story_ids = await make_request(f"{base_url}/topstories.json")
+        if not story_ids:
+            return
+        story_ids = story_ids[:self.size]
+        changed = set(updated_ids)
+        stale = [item_id for item_id in story_ids if item_id not in self.items or item_id in changed]
+        fetched = await asyncio.gather(*(self.service._get_hn_item(item_id) for item_id in stale))
+
+        items = {item_id: self.items[item_id] for item_id in story_ids if item_id in self.items}
+        for item_id, item in zip(stale, fetched):
+            if item:
+                items[item_id] = item
+        self.items = items
+        self.stories = [items[item_id] for item_id in story_ids
+                        if item_id in items and items[item_id].get("type") == "story"]
+        self._max_item = max_item
+        self._updated_ids = updated_ids
+        self.last_refresh = time.time()
+
+    def start(self, interval_seconds: float) -> None:
+        """Poll in the background until stop()"""
+        self.interval_seconds = interval_seconds
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(interval_seconds))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"Hacker News refresh failed: {e}")
+            await asyncio.sleep(interval_seconds)
 
 class TrendsService:
     def __init__(self):
         self.github_token = get_api_key("github")
+        self.hn_base_url = "https://hacker-news.firebaseio.com/v0"
+        self.hn_item_timeout = float(os.getenv("HN_ITEM_TIMEOUT_SECONDS", "5"))
+        # Bounds concurrent item fetches across all requests, not just within one
+        self.hn_semaphore = asyncio.Semaphore(int(os.getenv("HN_FETCH_CONCURRENCY", "50")))
+        self.hn_feed = HackerNewsFeed(self)
     
     def _get_github_headers(self) -> Dict[str, str]:
         headers = {
@@ -16,13 +113,9 @@ class TrendsService:
             headers["Authorization"] = f"token {self.github_token}"
         return headers
     
-    async def get_github_trending(self, language: str = "", since: str = "daily") -> Optional[Dict[str, Any]]:
+    async def get_github_trending(self, language: str = "", since: str = "daily", raw: bool = False) -> Optional[Dict[str, Any]]:
         """Get trending GitHub repositories"""
         cache_key = f"github_trending_{language}_{since}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         # GitHub doesn't have a direct trending API, so we'll use search with stars
         url = "https://api.github.com/search/repositories"
         
@@ -44,69 +137,87 @@ class TrendsService:
             "per_page": 20
         }
         
-        data = await make_request(url, headers=self._get_github_headers(), params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=1800)  # Cache for 30 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, headers=self._get_github_headers(), params=params),
+            ttl=1800,  # Cache for 30 minutes
+            raw=raw
+        )
     
     async def get_hacker_news_top(self, count: int = 20) -> Optional[List[Dict[str, Any]]]:
-        """Get top stories from Hacker News"""
-        cache_key = f"hn_top_{count}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
-        # Get top story IDs
-        top_stories_url = "https://hacker-news.firebaseio.com/v0/topstories.json"
-        story_ids = await make_request(top_stories_url)
+        """Get top stories from Hacker News.
+
+        Served from memory while the background feed is current; otherwise the
+        ranking and each story are cached separately, so every ``count`` is
+        assembled from the same cached items and only missing IDs are fetched.
+        """
+        if self.hn_feed.ready and count <= self.hn_feed.size:
+            return self.hn_feed.top(count)
         
+        story_ids = await cache.get_or_fetch(
+            "hn_top_ids",
+            lambda: make_request(f"{self.hn_base_url}/topstories.json"),
+            ttl=300  # Cache for 5 minutes
+        )
         if not story_ids:
             return None
         
-        # Get details for top stories
-        stories = []
-        for story_id in story_ids[:count]:
-            story_url = f"https://hacker-news.firebaseio.com/v0/item/{story_id}.json"
-            story = await make_request(story_url)
-            if story and story.get("type") == "story":
-                stories.append(story)
-        
-        if stories:
-            await cache.set(cache_key, stories, ttl=900)  # Cache for 15 minutes
-        return stories
+        # gather keeps the ranking order
+        entries = await asyncio.gather(*(self._get_cached_hn_item(story_id) for story_id in story_ids[:count]))
+        # Each lookup ran in its own task, so staleness is recorded here for the response headers
+        cache.note_stale(entries)
+        items = [entry.value for entry in entries if entry is not None]
+        return [story for story in items if story and story.get("type") == "story"]
+    
+    async def _get_cached_hn_item(self, item_id: int) -> Optional[CacheEntry]:
+        """Get one Hacker News item's cache entry through the per-item cache"""
+        return await cache.get_or_fetch(
+            f"hn_item_{item_id}",
+            lambda: self._get_hn_item(item_id),
+            ttl=900,  # Cache for 15 minutes
+            raw=True
+        )
+    
+    async def _get_hn_item(self, item_id: int) -> Optional[Dict[str, Any]]:
+        """Fetch one Hacker News item, giving up on it after the per-item timeout"""
+        async with self.hn_semaphore:
+            try:
+                return await asyncio.wait_for(
+                    make_request(f"{self.hn_base_url}/item/{item_id}.json"),
+                    timeout=self.hn_item_timeout
+                )
+            except asyncio.TimeoutError:
+                print(f"Timed out fetching Hacker News item {item_id}")
+                return None
     
-    async def get_dev_to_trending(self) -> Optional[List[Dict[str, Any]]]:
+    async def get_dev_to_trending(self, raw: bool = False) -> Optional[List[Dict[str, Any]]]:
         """Get trending articles from Dev.to"""
         cache_key = "devto_trending"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         url = "https://dev.to/api/articles"
         params = {
             "top": "7",  # Top articles from past 7 days
             "per_page": 20
         }
         
-        data = await make_request(url, params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=1800)  # Cache for 30 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, params=params),
+            ttl=1800,  # Cache for 30 minutes
+            raw=raw
+        )
     
-    async def get_reddit_programming(self, subreddit: str = "programming") -> Optional[Dict[str, Any]]:
+    async def get_reddit_programming(self, subreddit: str = "programming", raw: bool = False) -> Optional[Dict[str, Any]]:
         """Get hot posts from programming subreddits"""
         cache_key = f"reddit_{subreddit}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         url = f"https://www.reddit.com/r/{subreddit}/hot.json"
         params = {"limit": 20}
         headers = {"User-Agent": "API-Dashboard/1.0"}
         
-        data = await make_request(url, headers=headers, params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=900)  # Cache for 15 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, headers=headers, params=params),
+            ttl=900,  # Cache for 15 minutes
+            raw=raw
+        )
 
 trends_service = TrendsService()
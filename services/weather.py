@@ -8,16 +8,12 @@ class WeatherService:
         self.base_url = "https://api.openweathermap.org/data/2.5"
         self.api_key = get_api_key("openweather")
     
-    async def get_current_weather(self, city: str) -> Optional[Dict[str, Any]]:
+    async def get_current_weather(self, city: str, raw: bool = False) -> Optional[Dict[str, Any]]:
         """Get current weather for a city"""
         if not self.api_key:
             return {"error": "OpenWeather API key not configured"}
         
         cache_key = f"current_weather_{city.lower()}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         url = f"{self.base_url}/weather"
         params = {
             "q": city,
@@ -25,21 +21,19 @@ class WeatherService:
             "units": "metric"
         }
         
-        data = await make_request(url, params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=600)  # Cache for 10 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, params=params),
+            ttl=600,  # Cache for 10 minutes
+            raw=raw
+        )
     
-    async def get_weather_forecast(self, city: str, days: int = 5) -> Optional[Dict[str, Any]]:
+    async def get_weather_forecast(self, city: str, days: int = 5, raw: bool = False) -> Optional[Dict[str, Any]]:
         """Get weather forecast for a city"""
         if not self.api_key:
             return {"error": "OpenWeather API key not configured"}
         
         cache_key = f"weather_forecast_{city.lower()}_{days}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         url = f"{self.base_url}/forecast"
         params = {
             "q": city,
@@ -48,21 +42,19 @@ class WeatherService:
             "cnt": days * 8  # 8 forecasts per day (every 3 hours)
         }
         
-        data = await make_request(url, params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=1800)  # Cache for 30 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, params=params),
+            ttl=1800,  # Cache for 30 minutes
+            raw=raw
+        )
     
-    async def get_weather_by_coordinates(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    async def get_weather_by_coordinates(self, lat: float, lon: float, raw: bool = False) -> Optional[Dict[str, Any]]:
         """Get current weather by coordinates"""
         if not self.api_key:
             return {"error": "OpenWeather API key not configured"}
         
         cache_key = f"weather_coords_{lat}_{lon}"
-        cached_data = await cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
         url = f"{self.base_url}/weather"
         params = {
             "lat": lat,
@@ -71,9 +63,11 @@ class WeatherService:
             "units": "metric"
         }
         
-        data = await make_request(url, params=params)
-        if data:
-            await cache.set(cache_key, data, ttl=600)  # Cache for 10 minutes
-        return data
+        return await cache.get_or_fetch(
+            cache_key,
+            lambda: make_request(url, params=params),
+            ttl=600,  # Cache for 10 minutes
+            raw=raw
+        )
 
 weather_service = WeatherService()
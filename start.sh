@@ -30,7 +30,8 @@ fi
 mkdir -p cache
 
 echo "🔥 Starting FastAPI backend..."
-uvicorn app:app --host 0.0.0.0 --port 8000 --reload &
+# Live event streams never close on their own; cancel them this long after a stop or reload
+uvicorn app:app --host 0.0.0.0 --port 8000 --reload --timeout-graceful-shutdown "${SHUTDOWN_GRACE_SECONDS:-3}" &
 BACKEND_PID=$!
 
 # Wait for backend to start
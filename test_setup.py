@@ -55,7 +55,7 @@ async def test_services():
         print("\n📊 Testing events service...")
         await events_service.log_event("Test Event", "Testing the events system", "🧪")
         recent_events = await events_service.get_recent_events(10)
-        if recent_events:
+        if recent_events["events"]:
             print("✅ Events service working")
         else:
             print("⚠️ Events service returned no data")
@@ -75,9 +75,25 @@ async def test_services():
     except Exception as e:
         print(f"❌ Test failed: {e}")
         return False
+    finally:
+        await close_services()
     
     return True
 
+async def close_services():
+    """Close the connections the services opened lazily, so the interpreter can exit"""
+    try:
+        from services.crypto import crypto_service
+        from services.events import events_service
+        from utils.cache import cache
+        from utils.helpers import close_http_client
+    except ImportError:
+        return
+    await events_service.stop()
+    await crypto_service.close()
+    await cache.close()
+    await close_http_client()
+
 def check_environment():
     """Check if environment is properly set up"""
     print("🔍 Checking environment...")
@@ -0,0 +1,92 @@
+import asyncio
+
+from utils.cache import Cache
+
+def make_fetch(calls, delay=0.05):
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"price": 42}
+    return fetch
+
+def test_concurrent_misses_share_one_upstream_call(tmp_path):
+    async def run():
+        cache = Cache(db_path=str(tmp_path / "cache.db"))
+        calls = []
+        fetch = make_fetch(calls)
+        try:
+            results = await asyncio.gather(*(cache.get_or_fetch("key", fetch, ttl=60) for _ in range(500)))
+        finally:
+            await cache.close()
+        return calls, results
+
+    calls, results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [{"price": 42}] * 500
+
+def test_cancelled_waiter_does_not_cancel_shared_fetch(tmp_path):
+    async def run():
+        cache = Cache(db_path=str(tmp_path / "cache.db"))
+        calls = []
+        fetch = make_fetch(calls)
+        try:
+            cancelled = asyncio.create_task(cache.get_or_fetch("key", fetch, ttl=60))
+            waiter = asyncio.create_task(cache.get_or_fetch("key", fetch, ttl=60))
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            value = await waiter
+            stored = await cache.get("key")
+        finally:
+            await cache.close()
+        return calls, cancelled, value, stored
+
+    calls, cancelled, value, stored = asyncio.run(run())
+    assert cancelled.cancelled()
+    assert len(calls) == 1
+    assert value == {"price": 42}
+    assert stored == {"price": 42}
+
+def test_close_cancels_background_refreshes_and_stays_closed(tmp_path):
+    async def run():
+        cache = Cache(db_path=str(tmp_path / "cache.db"))
+        calls = []
+        await cache.set("key", {"price": 1}, ttl=60)
+        cache.l1.get("key").fresh_until = 0
+        stale = await cache.get_or_fetch("key", make_fetch(calls, delay=0.2), ttl=60)
+        refresh = cache._inflight["key"]
+        await cache.close()
+        await asyncio.sleep(0.3)
+        # Writes after close stay in memory and do not reopen the pool
+        await cache.set("late", {"price": 3}, ttl=60)
+        return stale, refresh, cache._pool, await cache.get("late")
+
+    stale, refresh, pool, late = asyncio.run(run())
+    assert stale == {"price": 1}
+    assert refresh.cancelled()
+    assert pool is None
+    assert late == {"price": 3}
+
+def test_unreadable_rows_are_treated_as_misses(tmp_path):
+    async def run():
+        cache = Cache(db_path=str(tmp_path / "cache.db"))
+        calls = []
+        try:
+            async with cache._connection() as conn:
+                await conn.executemany(
+                    "INSERT INTO cache (key, value, expires_at, created_at, fresh_until, codec) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        ("unknown", b"...", 2e9, 0, 2e9, "no-such-codec"),
+                        ("corrupt", b"not gzip", 2e9, 0, 2e9, "gzip")
+                    ]
+                )
+                await conn.commit()
+            values = [await cache.get_or_fetch(key, make_fetch(calls), ttl=60) for key in ("unknown", "corrupt")]
+            cache.l1.clear()
+            stored = [await cache.get(key) for key in ("unknown", "corrupt")]
+        finally:
+            await cache.close()
+        return calls, values, stored
+
+    calls, values, stored = asyncio.run(run())
+    assert len(calls) == 2
+    assert values == stored == [{"price": 42}] * 2
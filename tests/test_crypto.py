@@ -0,0 +1,271 @@
+import asyncio
+import time
+
+import numpy as np
+
+import services.crypto as crypto
+from utils.cache import Cache, stale_age
+
+def test_stale_coin_prices_flag_the_response(tmp_path, monkeypatch):
+    async def fetch_coin_price(coin):
+        return {"usd": 2.0}
+
+    async def run():
+        cache = Cache(db_path=str(tmp_path / "cache.db"))
+        monkeypatch.setattr(crypto, "cache", cache)
+        monkeypatch.setattr(crypto.crypto_service, "_fetch_coin_price", fetch_coin_price)
+        try:
+            for coin in ("bitcoin", "ethereum"):
+                await cache.set(f"crypto_price_{coin}", {"usd": 1.0}, ttl=60)
+                cache.l1.get(f"crypto_price_{coin}").fresh_until = time.time() - 1
+            entry = await crypto.crypto_service.get_crypto_prices(["bitcoin", "ethereum"], raw=True)
+            result = entry.value, cache.counters["stale_hits"], stale_age.get(), cache.freshness_headers()
+            # Let the background refreshes finish before closing the pool
+            await asyncio.sleep(0.05)
+        finally:
+            await cache.close()
+        return result
+
+    value, stale_hits, age, headers = asyncio.run(run())
+    assert value == {"bitcoin": {"usd": 1.0}, "ethereum": {"usd": 1.0}}
+    assert stale_hits == 2
+    assert age is not None
+    assert headers["X-Cache-Status"] == "stale"
+
+def test_price_batcher_unions_concurrent_lookups():
+    calls = []
+
+    async def fetch(ids):
+        calls.append(ids)
+        return {coin: {"usd": float(len(coin))} for coin in ids if coin != "unknown"}
+
+    async def run():
+        batcher = crypto.PriceBatcher(fetch, window=0.01, max_ids=250)
+        return await asyncio.gather(
+            batcher.get(["bitcoin"]),
+            batcher.get(["ethereum", "bitcoin"]),
+            batcher.get(["solana", "unknown"])
+        ), batcher.stats
+
+    results, stats = asyncio.run(run())
+    assert calls == [["bitcoin", "ethereum", "solana", "unknown"]]
+    assert results == [
+        {"bitcoin": {"usd": 7.0}},
+        {"ethereum": {"usd": 8.0}, "bitcoin": {"usd": 7.0}},
+        {"solana": {"usd": 6.0}}
+    ]
+    assert stats == {"requests": 3, "upstream_calls": 1}
+
+def test_price_batcher_flushes_early_at_max_ids():
+    calls = []
+
+    async def fetch(ids):
+        calls.append(ids)
+        return {coin: {"usd": 1.0} for coin in ids}
+
+    async def run():
+        # A window far longer than the test timeout, so only the size limit can flush
+        batcher = crypto.PriceBatcher(fetch, window=60, max_ids=2)
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.get(["a"]), batcher.get(["b"])),
+            timeout=1
+        )
+
+    assert asyncio.run(run()) == [{"a": {"usd": 1.0}}, {"b": {"usd": 1.0}}]
+    assert calls == [["a", "b"]]
+
+def test_price_batcher_passes_upstream_failure_to_every_caller():
+    async def fetch(ids):
+        return None
+
+    async def run():
+        batcher = crypto.PriceBatcher(fetch, window=0.01, max_ids=250)
+        return await asyncio.gather(batcher.get(["bitcoin"]), batcher.get(["ethereum"]))
+
+    assert asyncio.run(run()) == [None, None]
+
+class FakeChartUpstream:
+    """market_chart and market_chart/range with CoinGecko's point spacing, on a clock tests can move"""
+
+    def __init__(self):
+        self.offset = 0.0
+        self.calls = []
+        self.available = True
+
+    def time(self):
+        return time.time() + self.offset
+
+    @staticmethod
+    def price(ts):
+        return round(ts / 1e9, 3)
+
+    def chart(self, start_ms, end_ms, step_ms):
+        stamps = list(range(start_ms - start_ms % step_ms + step_ms, end_ms, step_ms)) + [end_ms]
+        return {name: [[ts, self.price(ts)] for ts in stamps] for name in crypto.CHART_SERIES}
+
+    async def fetch(self, coin, days):
+        self.calls.append(("full", coin, days))
+        if not self.available:
+            return None
+        now_ms = int(self.time() * 1000)
+        step = crypto.BUCKET_MS[crypto.history_granularity(days)]
+        return self.chart(now_ms - days * crypto.DAY_MS, now_ms, step)
+
+    async def fetch_range(self, coin, start, end):
+        self.calls.append(("range", coin, start, end))
+        if not self.available:
+            return None
+        # Five-minute points for up to a day, hourly beyond that
+        step = 300 * 1000 if end - start <= 86400 else 3600 * 1000
+        return self.chart(start * 1000, end * 1000, step)
+
+def make_history(tmp_path, monkeypatch):
+    upstream = FakeChartUpstream()
+    monkeypatch.setattr(crypto, "time", upstream)
+    store = crypto.HistoryStore(upstream.fetch, upstream.fetch_range, db_path=str(tmp_path / "history.db"), ttl=300)
+    return upstream, store
+
+def test_chart_to_rows_keeps_the_latest_point_up_to_each_boundary():
+    hour = crypto.BUCKET_MS["hourly"]
+    day = crypto.DAY_MS
+    chart = {
+        "prices": [[day, 1.0], [day + 3 * hour, 2.0], [day + 23 * hour, 3.0], [2 * day, 4.0], [2 * day + hour, 5.0]],
+        "market_caps": [],
+        "total_volumes": []
+    }
+    rows = crypto.chart_to_rows(chart, "daily")
+    # Settled days keep their 00:00 close, the open day its latest point
+    assert [(bucket, ts, price) for bucket, ts, price, *_ in rows] == [(1, day, 1.0), (2, 2 * day, 4.0), (3, 2 * day + hour, 5.0)]
+
+def test_history_serves_shorter_ranges_by_slicing(tmp_path, monkeypatch):
+    async def run():
+        upstream, store = make_history(tmp_path, monkeypatch)
+        try:
+            year = (await store.get("bitcoin", 365)).value
+            shorter = {days: (await store.get("bitcoin", days)).value for days in (90, 30, 7, 2)}
+            calls_after_daily = list(upstream.calls)
+            day = (await store.get("bitcoin", 1)).value
+            year_again = (await store.get("bitcoin", 365)).value
+        finally:
+            await store.close()
+        return upstream.calls, calls_after_daily, year, shorter, day, year_again
+
+    calls, calls_after_daily, year, shorter, day, year_again = asyncio.run(run())
+    assert calls_after_daily == [("full", "bitcoin", 365)]
+    assert calls == [("full", "bitcoin", 365), ("full", "bitcoin", 1)]
+    assert len(year["prices"]) == 366
+    for days, chart in shorter.items():
+        assert chart["prices"] == year["prices"][-(days + 1):]
+        assert chart["total_volumes"] == year["total_volumes"][-(days + 1):]
+    # Hourly and daily series are stored apart
+    assert len(day["prices"]) == 25
+    assert all(ts % crypto.BUCKET_MS["hourly"] == 0 for ts, _ in day["prices"][:-1])
+    assert all(ts % crypto.DAY_MS == 0 for ts, _ in year["prices"][:-1])
+    assert year_again == year
+
+def test_history_refresh_fetches_only_new_points(tmp_path, monkeypatch):
+    async def run():
+        upstream, store = make_history(tmp_path, monkeypatch)
+        try:
+            before = (await store.get("bitcoin", 30)).value
+            upstream.offset += 3 * 86400
+            upstream.calls.clear()
+            after = (await store.get("bitcoin", 30)).value
+            expected = upstream.chart(
+                int(upstream.time() * 1000) - 30 * crypto.DAY_MS, int(upstream.time() * 1000), crypto.DAY_MS
+            )
+        finally:
+            await store.close()
+        return upstream.calls, before, after, expected
+
+    calls, before, after, expected = asyncio.run(run())
+    last_ts = before["prices"][-1][0]
+    assert len(calls) == 1
+    assert calls[0][:3] == ("range", "bitcoin", last_ts // 1000)
+    # Same settled closes as a full refetch; only the live point's timestamp is rounded to seconds
+    assert after["prices"][:-1] == expected["prices"][:-1]
+    assert after["prices"][-1][1] == expected["prices"][-1][1]
+
+def test_history_serves_stored_series_when_upstream_fails(tmp_path, monkeypatch):
+    async def run():
+        upstream, store = make_history(tmp_path, monkeypatch)
+        try:
+            before = (await store.get("bitcoin", 7)).value
+            upstream.offset += 600
+            upstream.available = False
+            after = (await store.get("bitcoin", 7)).value
+        finally:
+            await store.close()
+        return upstream.calls, before, after
+
+    calls, before, after = asyncio.run(run())
+    assert [call[0] for call in calls] == ["full", "range"]
+    assert after == before
+
+def test_hourly_history_is_pruned_to_its_retention(tmp_path, monkeypatch):
+    async def run():
+        upstream, store = make_history(tmp_path, monkeypatch)
+        try:
+            await store.get("bitcoin", 1)
+            for _ in range(5):
+                upstream.offset += 86400
+                day = (await store.get("bitcoin", 1)).value
+            conn = await store._connection()
+            async with conn.execute("SELECT COUNT(*) FROM history WHERE granularity = 'hourly'") as cursor:
+                (rows,) = await cursor.fetchone()
+        finally:
+            await store.close()
+        return day, rows
+
+    day, rows = asyncio.run(run())
+    assert len(day["prices"]) == 25
+    # Two days of hourly closes, the boundary bucket and the live point
+    assert rows <= crypto.HISTORY_RETENTION_DAYS["hourly"] * 24 + 2
+
+def reference_lttb(points, threshold):
+    """Straightforward LTTB over (x, y) pairs, for checking the vectorized version"""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    selected, a = [0], 0
+    for bucket in range(threshold - 2):
+        lo = int(bucket * every) + 1
+        hi = int((bucket + 1) * every) + 1
+        if bucket == threshold - 3:
+            avg_x, avg_y = points[-1]
+        else:
+            following = points[hi:min(int((bucket + 2) * every) + 1, n)]
+            avg_x = sum(x for x, _ in following) / len(following)
+            avg_y = sum(y for _, y in following) / len(following)
+        ax, ay = points[a]
+        areas = [abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay)) for x, y in points[lo:hi]]
+        a = lo + areas.index(max(areas))
+        selected.append(a)
+    selected.append(n - 1)
+    return selected
+
+def test_lttb_matches_reference_on_random_walks():
+    rng = np.random.default_rng(3)
+    for n, threshold in ((8761, 400), (366, 100), (1000, 999), (50, 3), (10, 5)):
+        x = 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 3_600_000
+        y = 100 + np.cumsum(rng.standard_normal(n))
+        expected = reference_lttb(list(zip(x.astype(float).tolist(), y.tolist())), threshold)
+        assert crypto.lttb_indices(x, y, threshold).tolist() == expected
+
+def test_lttb_keeps_every_point_when_threshold_is_not_below_length():
+    x = np.arange(20, dtype=np.int64)
+    y = np.sin(x)
+    for threshold in (20, 25):
+        assert crypto.lttb_indices(x, y, threshold).tolist() == list(range(20))
+
+def test_lttb_chooses_points_across_nan_gaps():
+    rng = np.random.default_rng(5)
+    x = np.arange(500, dtype=np.int64) * 60_000
+    y = 100 + np.cumsum(rng.standard_normal(500))
+    y[40:60] = np.nan
+    y[0] = np.nan
+    selected = crypto.lttb_indices(x, y, 50)
+    filled = np.interp(x, x[~np.isnan(y)], y[~np.isnan(y)])
+    assert selected.tolist() == reference_lttb(list(zip(x.astype(float).tolist(), filled.tolist())), 50)
+    assert crypto.lttb_indices(x, np.full(500, np.nan), 50).tolist() == np.linspace(0, 499, 50).astype(int).tolist()
@@ -0,0 +1,210 @@
+import asyncio
+import random
+import time
+import tracemalloc
+
+from services.events import EventRecord, EventRing, EventStats, EventStore, EventsService
+
+TYPES = ("API Call", "Page View", "Error")
+
+def record(seq):
+    return EventRecord(seq, TYPES[seq % len(TYPES)], "description", "icon", float(seq))
+
+def test_ring_stays_bounded_over_many_appends():
+    capacity = 1000
+    ring = EventRing(capacity)
+    tracemalloc.start()
+    # After one full turn every held record was allocated while tracing
+    for seq in range(1, 2 * capacity + 1):
+        ring.append(record(seq))
+    before = tracemalloc.get_traced_memory()[0]
+    for seq in range(2 * capacity + 1, 100_001):
+        ring.append(record(seq))
+    grown = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    assert len(ring) == capacity
+    assert grown < 16 * 1024
+    assert set(ring.types) == set(TYPES)
+    assert sum(len(ids) for ids in ring._by_type.values()) == capacity
+    assert [r.id for r in ring.latest(5)] == list(range(seq - 4, seq + 1))
+    errors = [r.id for r in ring.latest_of_types(["Error"], 3)]
+    assert errors == [i for i in range(seq - 20, seq + 1) if TYPES[i % len(TYPES)] == "Error"][-3:]
+    assert ring.get(seq - capacity) is None
+    assert ring.get(seq - capacity + 1).id == seq - capacity + 1
+
+def test_retention_keeps_stats_in_step_with_store(tmp_path):
+    async def run():
+        stats = EventStats()
+        store = EventStore(db_path=str(tmp_path / "events.db"), retention_days=1, max_rows=50, stats=stats)
+        await store.open()
+        now = time.time()
+        try:
+            for seq in range(1, 101):
+                # Every fifth event is older than the retention age
+                timestamp = now - 2 * 86400 if seq % 5 == 0 else now - 100 + seq
+                event = EventRecord(seq, TYPES[seq % len(TYPES)], "description", "icon", timestamp, "crypto")
+                store.append(event)
+                stats.add(event.event, event.service, event.timestamp)
+            await store.flush()
+            pruned = await store.apply_retention()
+            seeded = EventStats()
+            await store.seed_stats(seeded)
+        finally:
+            await store.close()
+        return pruned, stats, seeded
+
+    pruned, stats, seeded = asyncio.run(run())
+    assert pruned == 60
+    assert stats.total == seeded.total == 40
+    assert stats.by_type == seeded.by_type
+    assert stats.by_service == seeded.by_service == {"crypto": 40}
+    assert stats.per_minute == seeded.per_minute
+
+def make_service(tmp_path, monkeypatch, **env):
+    monkeypatch.delenv("LOGSNAG_API_KEY", raising=False)
+    monkeypatch.setenv("EVENTS_DB_PATH", str(tmp_path / "events.db"))
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return EventsService()
+
+def frame_ids(batch):
+    return [int(frame.split(b"\n", 1)[0][len(b"id: "):]) for frame in batch]
+
+def test_subscribe_replays_events_after_last_event_id(tmp_path, monkeypatch):
+    async def run():
+        service = make_service(tmp_path, monkeypatch)
+        for seq in range(10):
+            await service.log_event("API Call", f"call {seq}")
+        subscription = service.subscribe(last_event_id=7)
+        replayed = await subscription.next_batch()
+        await service.log_event("API Call", "live")
+        live = await subscription.next_batch()
+        service.unsubscribe(subscription)
+        return replayed, live
+
+    replayed, live = asyncio.run(run())
+    assert frame_ids(replayed) == [8, 9, 10]
+    assert frame_ids(live) == [11]
+
+def test_slow_subscriber_drops_oldest_events(tmp_path, monkeypatch):
+    async def run():
+        service = make_service(tmp_path, monkeypatch, EVENTS_STREAM_QUEUE_SIZE="5")
+        subscription = service.subscribe()
+        for seq in range(12):
+            await service.log_event("API Call", f"call {seq}")
+        batch = await subscription.next_batch()
+        service.unsubscribe(subscription)
+        return batch, subscription.dropped, service.get_stats()["stream"]
+
+    batch, dropped, stream = asyncio.run(run())
+    assert frame_ids(batch) == [8, 9, 10, 11, 12]
+    assert dropped == 7
+    assert stream == {"subscribers": 0, "dropped": 7}
+
+def test_close_streams_ends_waiting_subscribers(tmp_path, monkeypatch):
+    async def run():
+        service = make_service(tmp_path, monkeypatch)
+        subscription = service.subscribe()
+        waiting = asyncio.create_task(subscription.next_batch())
+        await asyncio.sleep(0)
+        service.close_streams()
+        batch = await asyncio.wait_for(waiting, timeout=1)
+        late = service.subscribe()
+        return batch, subscription.closed, late.closed
+
+    batch, closed, late_closed = asyncio.run(run())
+    assert batch == []
+    assert closed and late_closed
+
+def test_pending_writes_are_bounded(tmp_path):
+    async def run():
+        store = EventStore(db_path=str(tmp_path / "events.db"), max_pending=100)
+        # Never opened, so nothing is written and the backlog has to stay capped
+        for seq in range(1, 1001):
+            store.append(record(seq))
+        await store.open()
+        try:
+            written = await store.flush()
+            stored = await store.latest(1000)
+        finally:
+            await store.close()
+        return written, stored, store.write_stats
+
+    written, stored, write_stats = asyncio.run(run())
+    assert written == 100
+    assert [r.id for r in stored] == list(range(901, 1001))
+    assert write_stats["dropped"] == 900
+
+def test_failed_writes_requeue_within_the_bound(tmp_path):
+    async def run():
+        store = EventStore(db_path=str(tmp_path / "events.db"), max_pending=100)
+        await store.open()
+        real_executemany = store._conn.executemany
+
+        async def failing_executemany(*args):
+            raise RuntimeError("disk I/O error")
+
+        store._conn.executemany = failing_executemany
+        try:
+            for seq in range(1, 81):
+                store.append(record(seq))
+            try:
+                await store.flush()
+            except RuntimeError:
+                pass
+            for seq in range(81, 161):
+                store.append(record(seq))
+            store._conn.executemany = real_executemany
+            await store.flush()
+            stored = await store.latest(1000)
+        finally:
+            await store.close()
+        return stored, store.write_stats
+
+    stored, write_stats = asyncio.run(run())
+    assert [r.id for r in stored] == list(range(61, 161))
+    assert write_stats["dropped"] == 60
+
+def test_recent_events_pages_match_brute_force(tmp_path, monkeypatch):
+    async def run():
+        # A ring much smaller than the history, so pages mix ring and SQLite reads
+        service = make_service(tmp_path, monkeypatch, EVENTS_BUFFER_CAPACITY="100")
+        await service.start()
+        rng = random.Random(7)
+        names = ["API Call", "Page View", "Error", "API Started"]
+        logged = []
+        try:
+            for seq in range(2000):
+                # Skewed so some types are rare in the ring
+                name = rng.choices(names, weights=[60, 30, 8, 2])[0]
+                await service.log_event(name, f"event {seq}")
+                logged.append((seq + 1, name))
+            results = {}
+            for limit in (1, 7, 50, 100):
+                for filters in ({}, {"event_type": "Error"}, {"event_type": "API Started"},
+                                {"type_contains": "api"}, {"type_contains": "missing"}):
+                    pages, cursor = [], None
+                    while True:
+                        page = await service.get_recent_events(limit, cursor=cursor, **filters)
+                        pages.append([event["id"] for event in page["events"]])
+                        cursor = page["next_cursor"]
+                        if cursor is None:
+                            break
+                    results[limit, tuple(filters.items())] = pages
+        finally:
+            await service.stop()
+        return logged, results
+
+    logged, results = asyncio.run(run())
+    for (limit, filters), pages in results.items():
+        filters = dict(filters)
+        expected = [
+            seq for seq, name in logged
+            if name == filters.get("event_type", name)
+            and filters.get("type_contains", "").lower() in name.lower()
+        ]
+        collected = [seq for page in reversed(pages) for seq in page]
+        assert collected == expected, (limit, filters)
+        assert all(len(page) == limit for page in pages[:-1]), (limit, filters)
+        assert all(page == sorted(page) for page in pages)
@@ -5,6 +5,8 @@ from .helpers import (
     format_percentage,
     validate_ip,
     make_request,
+    get_http_client,
+    close_http_client,
     parse_iso_date,
     truncate_text
 )
@@ -16,6 +18,8 @@ __all__ = [
     "format_percentage",
     "validate_ip",
     "make_request",
+    "get_http_client",
+    "close_http_client",
     "parse_iso_date",
     "truncate_text"
 ]
@@ -1,65 +1,557 @@
-import json
 import time
 import sqlite3
+import asyncio
 import aiosqlite
-from typing import Any, Optional
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta
 import os
+from .codec import CODECS, CONTENT_CODINGS, decode_json, encode_json, get_codec
+
+# Age in seconds of the stalest value served in the current request context
+stale_age: ContextVar[Optional[float]] = ContextVar("stale_age", default=None)
+
+_UNDECODED = object()
+
+# Payloads at least this large are compressed in a worker thread
+LARGE_PAYLOAD_BYTES = 64 * 1024
+
+# Decoded JSON takes roughly this many times its serialized size in memory
+DECODED_SIZE_FACTOR = 4
+
+class CacheEntry:
+    """Serialized JSON with its soft (fresh_until) and hard (expires_at) deadlines.
+
+    The decoded value is only built when a caller asks for it, so entries
+    served straight to the client are never parsed. Compressed response
+    bodies are built at most once per entry and kept in ``encodings``.
+    ``size`` counts all of these, and growth after the entry is stored in a
+    MemoryLRU is charged to that LRU's budget.
+    """
+    __slots__ = ("raw", "_value", "created_at", "fresh_until", "expires_at", "encodings", "_lru")
+
+    def __init__(self, raw: bytes, created_at: float, fresh_until: float, expires_at: float):
+        self.raw = raw
+        self._value = _UNDECODED
+        self.created_at = created_at
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+        self.encodings: Dict[str, bytes] = {}
+        self._lru: Optional["MemoryLRU"] = None
+
+    @property
+    def value(self) -> Any:
+        if self._value is _UNDECODED:
+            self._value = decode_json(self.raw)
+            self._charge(len(self.raw) * DECODED_SIZE_FACTOR)
+        return self._value
+
+    @property
+    def size(self) -> int:
+        """Approximate bytes held: the JSON, its compressed bodies and the decoded value if built"""
+        size = len(self.raw) + sum(len(body) for body in self.encodings.values())
+        if self._value is not _UNDECODED:
+            size += len(self.raw) * DECODED_SIZE_FACTOR
+        return size
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    async def encoded(self, encoding: str) -> bytes:
+        """Body compressed with an HTTP content-coding, computed once per entry"""
+        body = self.encodings.get(encoding)
+        if body is None:
+            codec = get_codec(encoding)
+            if len(self.raw) >= LARGE_PAYLOAD_BYTES:
+                body = await asyncio.to_thread(codec.compress, self.raw)
+                # Another request may have compressed it while this one waited
+                if encoding in self.encodings:
+                    return self.encodings[encoding]
+            else:
+                body = codec.compress(self.raw)
+            self.add_encoding(encoding, body)
+        return body
+
+    def add_encoding(self, encoding: str, body: bytes) -> None:
+        self.encodings[encoding] = body
+        self._charge(len(body))
+
+    def _charge(self, nbytes: int) -> None:
+        if self._lru is not None:
+            self._lru.charge(nbytes)
+
+class MemoryLRU:
+    """In-process LRU bounded by entry count and total bytes held by its entries"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return an entry that has not hit its hard expiry and mark it most recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry.expires_at:
+            self.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """Store an entry, evicting least recently used entries to stay in budget"""
+        self.pop(key)
+        if self.max_entries <= 0 or entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        entry._lru = self
+        self.current_bytes += entry.size
+        self._evict_to_budget()
+
+    def charge(self, nbytes: int) -> None:
+        """Account for an entry that grew after it was stored"""
+        self.current_bytes += nbytes
+        self._evict_to_budget()
+
+    def _evict_to_budget(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            evicted._lru = None
+            self.current_bytes -= evicted.size
+            self.evictions += 1
+
+    def pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry._lru = None
+            self.current_bytes -= entry.size
+
+    def purge_expired(self) -> int:
+        """Drop entries past their hard expiry, returning how many were removed"""
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if now >= entry.expires_at]
+        for key in expired:
+            self.pop(key)
+        return len(expired)
+
+    def clear(self) -> None:
+        for entry in self._entries.values():
+            entry._lru = None
+        self._entries.clear()
+        self.current_bytes = 0
 
 class Cache:
-    def __init__(self, db_path: str = "cache.db", ttl_seconds: int = 300):
+    def __init__(
+        self,
+        db_path: str = "cache.db",
+        ttl_seconds: int = 300,
+        stale_factor: float = 1.0,
+        pool_size: int = 4,
+        mmap_size: int = 64 * 1024 * 1024,
+        cache_size_kb: int = 8192,
+        l1_max_entries: int = 1024,
+        l1_max_bytes: int = 32 * 1024 * 1024,
+        sweep_batch_size: int = 500,
+        incremental_vacuum: bool = False,
+        vacuum_pages: int = 1000,
+        compression: str = "gzip",
+        compress_min_bytes: int = 1024
+    ):
         self.db_path = db_path
         self.ttl_seconds = ttl_seconds
+        # Stale window past the soft TTL, as a multiple of the TTL
+        self.stale_factor = stale_factor
+        self.l1 = MemoryLRU(l1_max_entries, l1_max_bytes)
+        self.counters = {
+            "l1_hits": 0,
+            "l1_misses": 0,
+            "l2_hits": 0,
+            "l2_misses": 0,
+            "stale_hits": 0,
+            "background_refreshes": 0
+        }
+        self.pool_size = max(1, pool_size)
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self._pool: Optional[asyncio.Queue] = None
+        self._connections: List[aiosqlite.Connection] = []
+        self._pool_lock = asyncio.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Set by close(); a closed cache keeps serving L1 but never reopens SQLite by itself
+        self._closed = False
+        self.sweep_batch_size = max(1, sweep_batch_size)
+        self.incremental_vacuum = incremental_vacuum
+        self.vacuum_pages = vacuum_pages
+        self.sweep_stats = {
+            "sweeps": 0,
+            "rows_swept": 0,
+            "bytes_swept": 0,
+            "bytes_vacuumed": 0,
+            "last_sweep_at": None
+        }
+        self._sweeper: Optional[asyncio.Task] = None
+        if compression not in CODECS:
+            print(f"Cache codec {compression} is not available, falling back to gzip")
+            compression = "gzip"
+        self.codec = get_codec(compression)
+        self.compress_min_bytes = compress_min_bytes
         self.setup_database()
-    
+
     def setup_database(self):
         """Initialize the cache database"""
         conn = sqlite3.connect(self.db_path)
+        if self.incremental_vacuum and conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Switching an existing database to incremental auto-vacuum needs one full VACUUM
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        # WAL is persistent, so setting it once here covers every pooled connection
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS cache (
                 key TEXT PRIMARY KEY,
-                value TEXT,
-                expires_at REAL
+                value BLOB,
+                expires_at REAL,
+                created_at REAL,
+                fresh_until REAL,
+                codec TEXT
             )
         """)
+        # Databases created by earlier versions lack the newer columns
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+        for column, column_type in (("created_at", "REAL"), ("fresh_until", "REAL"), ("codec", "TEXT")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE cache ADD COLUMN {column} {column_type}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache (expires_at)")
         conn.commit()
         conn.close()
-    
-    async def get(self, key: str) -> Optional[Any]:
-        """Get value from cache if not expired"""
-        async with aiosqlite.connect(self.db_path) as conn:
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Open a pooled connection with per-connection pragmas applied"""
+        conn = await aiosqlite.connect(self.db_path)
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        await conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        await conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    async def open(self) -> None:
+        """Open the connection pool (called on app startup, or lazily on first use)"""
+        async with self._pool_lock:
+            self._closed = False
+            if self._pool is not None:
+                return
+            pool = asyncio.Queue()
+            for _ in range(self.pool_size):
+                conn = await self._connect()
+                self._connections.append(conn)
+                pool.put_nowait(conn)
+            self._pool = pool
+
+    async def close(self) -> None:
+        """Stop the sweeper and background refreshes, then close every pooled connection (called on app shutdown)"""
+        self._closed = True
+        await self.stop_sweeper()
+        inflight = list(self._inflight.values())
+        for future in inflight:
+            future.cancel()
+        await asyncio.gather(*inflight, return_exceptions=True)
+        async with self._pool_lock:
+            connections, self._connections = self._connections, []
+            self._pool = None
+            for conn in connections:
+                await conn.close()
+
+    @asynccontextmanager
+    async def _connection(self):
+        """Borrow a connection from the pool for the duration of the block"""
+        if self._pool is None:
+            if self._closed:
+                raise RuntimeError("Cache is closed")
+            await self.open()
+        pool = self._pool
+        conn = await pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put_nowait(conn)
+
+    async def _lookup(self, key: str) -> Optional[CacheEntry]:
+        """Find an entry that has not hit its hard expiry, trying memory before SQLite"""
+        entry = self.l1.get(key)
+        if entry is not None:
+            self.counters["l1_hits"] += 1
+            return entry
+        self.counters["l1_misses"] += 1
+        if self._closed:
+            self.counters["l2_misses"] += 1
+            return None
+
+        async with self._connection() as conn:
             cursor = await conn.execute(
-                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                "SELECT value, expires_at, created_at, fresh_until, codec FROM cache WHERE key = ?", (key,)
             )
             row = await cursor.fetchone()
-            
+            await cursor.close()
+
             if row:
-                value, expires_at = row
+                stored, expires_at, created_at, fresh_until, codec = row
+                raw = None
                 if time.time() < expires_at:
-                    return json.loads(value)
+                    if isinstance(stored, str):
+                        # Rows written before values were stored as bytes
+                        stored = stored.encode("utf-8")
+                    try:
+                        raw = get_codec(codec or "identity").decompress(stored)
+                    except Exception as e:
+                        # Written with a codec this process lacks, or corrupt; refetch rather than fail
+                        print(f"Dropping unreadable cache row {key}: {e}")
+                if raw is not None:
+                    self.counters["l2_hits"] += 1
+                    fresh_until = fresh_until or expires_at
+                    entry = CacheEntry(raw, created_at or fresh_until, fresh_until, expires_at)
+                    if codec in CONTENT_CODINGS:
+                        # The stored blob is already a ready-to-send compressed body
+                        entry.add_encoding(codec, stored)
+                    self.l1.set(key, entry)
+                    return entry
                 else:
-                    # Remove expired entry
+                    # Remove the expired or unreadable entry
                     await conn.execute("DELETE FROM cache WHERE key = ?", (key,))
                     await conn.commit()
+        self.counters["l2_misses"] += 1
         return None
-    
-    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set value in cache with TTL"""
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from cache if still within its soft TTL"""
+        entry = await self._lookup(key)
+        if entry is not None and entry.is_fresh(time.time()):
+            return entry.value
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, stale_ttl: Optional[int] = None) -> CacheEntry:
+        """Set value in cache with a soft TTL and a stale window after it"""
         ttl = ttl or self.ttl_seconds
-        expires_at = time.time() + ttl
-        
-        async with aiosqlite.connect(self.db_path) as conn:
+        if stale_ttl is None:
+            stale_ttl = ttl * self.stale_factor
+        now = time.time()
+        fresh_until = now + ttl
+        expires_at = fresh_until + stale_ttl
+        # The value is decoded again only if a caller asks for it, so entries served raw hold just bytes
+        entry = CacheEntry(encode_json(value), now, fresh_until, expires_at)
+        # Small payloads are not worth the compression overhead
+        codec = get_codec("identity") if entry.size < self.compress_min_bytes else self.codec
+
+        self.l1.set(key, entry)
+        if self._closed:
+            # A write that finishes after close() only reaches memory
+            return entry
+        if entry.size >= LARGE_PAYLOAD_BYTES:
+            # zlib and zstd release the GIL, so big payloads compress off the event loop
+            stored = await asyncio.to_thread(codec.compress, entry.raw)
+        else:
+            stored = codec.compress(entry.raw)
+        if codec.name in CONTENT_CODINGS:
+            entry.add_encoding(codec.name, stored)
+        async with self._connection() as conn:
             await conn.execute(
-                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
-                (key, json.dumps(value), expires_at)
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, created_at, fresh_until, codec) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, stored, expires_at, now, fresh_until, codec.name)
             )
             await conn.commit()
-    
-    async def clear_expired(self) -> None:
-        """Clear all expired entries"""
-        async with aiosqlite.connect(self.db_path) as conn:
-            await conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
-            await conn.commit()
+        return entry
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+        raw: bool = False
+    ) -> Optional[Any]:
+        """Get value from cache, or run a single upstream fetch shared by all concurrent callers.
+
+        Past the soft TTL the stale value is returned immediately and one
+        background refresh is started; only past the hard expiry do callers wait.
+        With raw=True the CacheEntry is returned instead of the decoded value, so
+        its stored bytes can be sent to the client without decoding.
+        """
+        entry = await self._lookup(key)
+        if entry is not None:
+            now = time.time()
+            if not entry.is_fresh(now):
+                self.counters["stale_hits"] += 1
+                self.note_stale([entry])
+                if key not in self._inflight:
+                    self.counters["background_refreshes"] += 1
+                    self._start_fetch(key, fetch, ttl, stale_ttl)
+            return entry if raw else entry.value
+
+        future = self._inflight.get(key)
+        if future is None:
+            # A fetch may have finished while we were reading SQLite; it writes L1 first
+            entry = self.l1.get(key)
+            if entry is not None:
+                return entry if raw else entry.value
+            future = self._start_fetch(key, fetch, ttl, stale_ttl)
+        # Shield so one cancelled caller does not cancel the fetch for everyone else
+        value, entry = await asyncio.shield(future)
+        if raw:
+            # Falsy results are never stored, so there is no entry to hand back
+            return entry
+        return value
+
+    def _start_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[int],
+        stale_ttl: Optional[int]
+    ) -> asyncio.Future:
+        future = asyncio.ensure_future(self._fetch_and_store(key, fetch, ttl, stale_ttl))
+        self._inflight[key] = future
+        future.add_done_callback(lambda done: self._finish_fetch(key, done))
+        return future
+
+    def _finish_fetch(self, key: str, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        # Background refreshes have no awaiting caller, so surface their failures here
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Cache refresh for {key} failed: {future.exception()}")
+
+    async def _fetch_and_store(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[int],
+        stale_ttl: Optional[int]
+    ) -> Tuple[Any, Optional[CacheEntry]]:
+        value = await fetch()
+        if not value:
+            return value, None
+        return value, await self.set(key, value, ttl=ttl, stale_ttl=stale_ttl)
+
+    def note_stale(self, entries: Iterable[Optional[CacheEntry]]) -> None:
+        """Record entries served past their soft TTL in the current request context.
+
+        get_or_fetch does this itself, but a read made in another task (such as
+        one of several lookups run with asyncio.gather) records it in that task's
+        copy of the context, so callers pass the entries they got back through here.
+        """
+        now = time.time()
+        for entry in entries:
+            if entry is not None and not entry.is_fresh(now):
+                stale_age.set(max(stale_age.get() or 0.0, now - entry.created_at))
+
+    def freshness_headers(self) -> Dict[str, str]:
+        """Response headers flagging stale data served in the current request"""
+        age = stale_age.get()
+        if age is None:
+            return {}
+        return {"X-Cache-Status": "stale", "Age": str(int(age))}
+
+    async def clear_expired(self) -> Dict[str, int]:
+        """Clear all expired entries in bounded batches, returning rows and bytes reclaimed"""
+        now = time.time()
+        rows_swept = bytes_swept = bytes_vacuumed = 0
+        self.l1.purge_expired()
+
+        while True:
+            # Each batch borrows its own connection so a large sweep never starves the pool
+            async with self._connection() as conn:
+                cursor = await conn.execute(
+                    "SELECT key, LENGTH(value) FROM cache WHERE expires_at < ? LIMIT ?",
+                    (now, self.sweep_batch_size)
+                )
+                rows = await cursor.fetchall()
+                await cursor.close()
+                if rows:
+                    await conn.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key, _ in rows])
+                    await conn.commit()
+            rows_swept += len(rows)
+            bytes_swept += sum(size or 0 for _, size in rows)
+            if len(rows) < self.sweep_batch_size:
+                break
+            await asyncio.sleep(0)
+
+        if self.incremental_vacuum and rows_swept:
+            async with self._connection() as conn:
+                before = await self._page_count(conn)
+                # The pragma frees one page per step; executescript steps it to completion
+                await conn.executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)});")
+                after = await self._page_count(conn)
+                cursor = await conn.execute("PRAGMA page_size")
+                page_size = (await cursor.fetchone())[0]
+                await cursor.close()
+            bytes_vacuumed = (before - after) * page_size
+
+        self.sweep_stats["sweeps"] += 1
+        self.sweep_stats["rows_swept"] += rows_swept
+        self.sweep_stats["bytes_swept"] += bytes_swept
+        self.sweep_stats["bytes_vacuumed"] += bytes_vacuumed
+        self.sweep_stats["last_sweep_at"] = now
+        return {"rows": rows_swept, "bytes": bytes_swept, "bytes_vacuumed": bytes_vacuumed}
+
+    async def _page_count(self, conn: aiosqlite.Connection) -> int:
+        cursor = await conn.execute("PRAGMA page_count")
+        row = await cursor.fetchone()
+        await cursor.close()
+        return row[0]
+
+    def start_sweeper(self, interval_seconds: float) -> None:
+        """Run clear_expired periodically in the background until close()"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop(interval_seconds))
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is None:
+            return
+        self._sweeper.cancel()
+        try:
+            await self._sweeper
+        except asyncio.CancelledError:
+            pass
+        self._sweeper = None
+
+    async def _sweep_loop(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.clear_expired()
+            except Exception as e:
+                print(f"Cache sweep failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per tier plus current L1 occupancy"""
+        return {
+            **self.counters,
+            "l1_entries": len(self.l1),
+            "l1_bytes": self.l1.current_bytes,
+            "l1_max_entries": self.l1.max_entries,
+            "l1_max_bytes": self.l1.max_bytes,
+            "l1_evictions": self.l1.evictions,
+            **self.sweep_stats
+        }
 
 # Global cache instance
-cache = Cache(ttl_seconds=int(os.getenv("CACHE_TTL_SECONDS", "300")))
+cache = Cache(
+    ttl_seconds=int(os.getenv("CACHE_TTL_SECONDS", "300")),
+    stale_factor=float(os.getenv("CACHE_STALE_FACTOR", "1.0")),
+    pool_size=int(os.getenv("CACHE_POOL_SIZE", "4")),
+    mmap_size=int(os.getenv("CACHE_MMAP_SIZE", str(64 * 1024 * 1024))),
+    cache_size_kb=int(os.getenv("CACHE_PAGE_CACHE_KB", "8192")),
+    l1_max_entries=int(os.getenv("CACHE_L1_MAX_ENTRIES", "1024")),
+    l1_max_bytes=int(os.getenv("CACHE_L1_MAX_BYTES", str(32 * 1024 * 1024))),
+    sweep_batch_size=int(os.getenv("CACHE_SWEEP_BATCH_SIZE", "500")),
+    incremental_vacuum=os.getenv("CACHE_INCREMENTAL_VACUUM", "False").lower() == "true",
+    vacuum_pages=int(os.getenv("CACHE_VACUUM_PAGES", "1000")),
+    compression=os.getenv("CACHE_COMPRESSION", "gzip"),
+    compress_min_bytes=int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+)
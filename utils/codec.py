@@ -0,0 +1,119 @@
+import gzip
+import json
+import zlib
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: zstd compression is only offered when installed
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # Optional: br responses are only offered when installed
+    brotli = None
+
+def encode_json(value: Any) -> bytes:
+    """Serialize a value to compact UTF-8 JSON"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            # orjson rejects a few inputs json accepts, such as non-string dict keys
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def decode_json(data: bytes) -> Any:
+    """Parse UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class Codec:
+    """Compression applied to serialized JSON before it is written to SQLite"""
+    name = "identity"
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+class ZlibCodec(Codec):
+    name = "zlib"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+class GzipCodec(Codec):
+    """gzip framing, so stored blobs double as Content-Encoding: gzip bodies"""
+    name = "gzip"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        # A fixed mtime keeps the output identical for identical payloads
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def decompress(self, data: bytes) -> bytes:
+        return gzip.decompress(data)
+
+class BrotliCodec(Codec):
+    name = "br"
+
+    def __init__(self, quality: int = 5):
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.quality)
+
+    def decompress(self, data: bytes) -> bytes:
+        return brotli.decompress(data)
+
+class ZstdCodec(Codec):
+    name = "zstd"
+
+    def __init__(self, level: int = 3):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+CODECS: Dict[str, Codec] = {}
+
+def register_codec(codec: Codec) -> None:
+    """Make a codec available for writing and for decoding rows that name it"""
+    CODECS[codec.name] = codec
+
+def get_codec(name: str) -> Codec:
+    """Look up a codec by the name recorded on a cache row"""
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown cache codec: {name}")
+
+register_codec(Codec())
+register_codec(ZlibCodec())
+register_codec(GzipCodec())
+if zstandard is not None:
+    register_codec(ZstdCodec())
+if brotli is not None:
+    register_codec(BrotliCodec())
+
+# Codecs whose output is a valid HTTP Content-Encoding body, in order of preference
+CONTENT_CODINGS = tuple(name for name in ("br", "gzip") if name in CODECS)
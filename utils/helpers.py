@@ -1,8 +1,12 @@
 import os
+import importlib.util
 from datetime import datetime
 from typing import Any, Dict, Optional
 import httpx
 
+# Shared client so upstream calls reuse pooled keep-alive connections
+_http_client: Optional[httpx.AsyncClient] = None
+
 def get_api_key(service: str) -> Optional[str]:
     """Get API key for a service from environment"""
     key_map = {
@@ -44,6 +48,32 @@ def validate_ip(ip: str) -> bool:
     except ValueError:
         return False
 
+def get_http_client() -> httpx.AsyncClient:
+    """Get the app-wide HTTP client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        http2 = os.getenv("HTTP2_ENABLED", "False").lower() == "true"
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            timeout=30,
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+                max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+                keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+            )
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the app-wide HTTP client and its pooled connections"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 async def make_request(
     url: str,
     headers: Optional[Dict[str, str]] = None,
@@ -52,10 +82,10 @@ async def make_request(
 ) -> Optional[Dict[str, Any]]:
     """Make HTTP request with error handling"""
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
+        client = get_http_client()
+        response = await client.get(url, headers=headers, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
     except httpx.HTTPError as e:
         print(f"HTTP error occurred: {e}")
         return None